@@ -1,15 +1,27 @@
 #! /usr/bin/env python3
 
 from collections import defaultdict
-import re
+import hashlib
+import json
+import os
+import sys
 
 from mistool.os_use import PPath
 from mistool.string_use import between, joinand
-from orpyste.data import ReadBlock
 
 BASENAME = PPath(__file__).stem.replace("build-", "")
 THIS_DIR = PPath(__file__).parent
 
+# The shared tools are in the parent folder.
+if str(THIS_DIR.parent) not in sys.path:
+    sys.path.insert(0, str(THIS_DIR.parent))
+
+from tools import CACHE_DIR
+from tools.manifest import filehash
+from tools.output import Outputs
+from tools.scan import Scan
+from tools.trace import span, traced
+
 STY_FILE = THIS_DIR / f'{BASENAME}.sty'
 TEX_FILE = STY_FILE.parent / (STY_FILE.stem + "[fr].tex")
 
@@ -17,6 +29,10 @@ KEYWORDS_FINAL_DIR = THIS_DIR.parent.parent / "lyalgo" / "keywords"
 KEYWORDS_DIR       = THIS_DIR / "keywords"
 LANG_PEUF_DIR      = KEYWORDS_DIR / "config"
 
+DOC_PEUF_PATH      = LANG_PEUF_DIR / "for-doc[fr].peuf"
+
+PEUF_CACHE_PATH = CACHE_DIR / "keywords-peuf.json"
+
 THIS_EXA_DIR       = THIS_DIR / "examples" / "algo-basic" / "additional-macros"
 LATEX_N_OUPUT_TEMP = """
 \\begin{{algo}}
@@ -27,18 +43,10 @@ LATEX_N_OUPUT_TEMP = """
 DECO   = " "*4
 DECO_2 = DECO*2
 
-ALL_LANGS = [
-    ppath.name
-    for ppath in LANG_PEUF_DIR.walk("dir::")
-    if ppath.parent == LANG_PEUF_DIR
-]
-
 DEFAULT_LANG = "english"
 
 ALL_MACROS = set()
 
-ALL_TRANS = defaultdict(dict)
-
 
 # ----------- #
 # -- TOOLS -- #
@@ -161,439 +169,688 @@ def texify(kind, trans):
     return tex_trans
 
 
-def build_tex_trans(lang):
-    global ALL_TRANS
+# The macros defined by "texify" for one kind of keywords.
+def definedmacros(kind, trans):
+    if kind == "repeat":
+        return ["Repeat"]
 
-    tex_trans = []
+    if kind == "ifelif":
+        return ["If"]
 
-    for peufpath in (
-        LANG_PEUF_DIR / lang
-    ).walk("file::*.peuf"):
-        with ReadBlock(
-            content = peufpath,
-            mode    = 'keyval:: ='
-        ) as data:
-            for kind, trans in data.mydict("std mini").items():
-                trans      = normalize(trans)
-                tex_trans += texify(kind, trans)
+    if kind == "switch":
+        return ["Switch"]
 
-                ALL_TRANS[lang].update(trans)
+    return list(trans)
 
-    return tex_trans
+
+# The files come from the shared scan : the folders are not walked again.
+def scanfiles(onedir, ext):
+    scan = Scan.load()
+    scan.save()
+
+    return sorted(
+        PPath(onepath)
+        for onepath in scan.under(onedir)
+        if onepath.suffix == ext
+    )
+
+
+def find_langs(lang_peuf_dir):
+    return sorted({
+        ppath.parent.name
+        for ppath in scanfiles(lang_peuf_dir, ".peuf")
+        if ppath.parent.parent == lang_peuf_dir
+    })
+
+
+# -------------------- #
+# -- KEYWORDS MODEL -- #
+# -------------------- #
+
+# The model built from the peufs is used for the sty and the doc.
+#
+#     * "blocks" gives for each language the list of ``[kind, trans]``
+#       in the order of the peuf files, with normalized translations.
+#
+#     * "kinds" gives for each kind the names of the macros defined.
+#       The default language comes first for the order of the macros.
+
+# orpyste is slow to import : it is only needed when the cache of the peufs
+# is not up to date.
+def read_lang_blocks(lang, lang_peuf_dir = LANG_PEUF_DIR):
+    from orpyste.data import ReadBlock
+
+    blocks = []
+
+    for peufpath in scanfiles(lang_peuf_dir / lang, ".peuf"):
+        if peufpath.parent != lang_peuf_dir / lang:
+            continue
+
+        with span("peuf parsing", cat = "parse", file = peufpath.name):
+            with ReadBlock(
+                content = peufpath,
+                mode    = 'keyval:: ='
+            ) as data:
+                for kind, trans in data.mydict("std mini").items():
+                    blocks.append([kind, dict(normalize(trans))])
+
+    return blocks
+
+
+def build_model(langs, lang_peuf_dir = LANG_PEUF_DIR):
+    model = {
+        "blocks": {
+            lang: read_lang_blocks(lang, lang_peuf_dir)
+            for lang in langs
+        },
+        "kinds": {},
+    }
+
+    for lang in sorted(langs, key = lambda l: (l != DEFAULT_LANG, l)):
+        for kind, trans in model["blocks"][lang]:
+            macros = model["kinds"].setdefault(kind, [])
+
+            for onemacro in definedmacros(kind, trans):
+                if onemacro not in macros:
+                    macros.append(onemacro)
+
+    return model
 
 
 # ------------------------- #
 # -- LANG SPECIFICATIONS -- #
 # ------------------------- #
 
-TEX_TRANS = {}
+def build_lang_specs(model):
+    all_trans = defaultdict(dict)
+    TEX_TRANS = {}
 
-for lang in ALL_LANGS:
-    TEX_TRANS[lang] = build_tex_trans(lang)
-    TEX_TRANS[lang] = [
-        l if l.startswith("%") else DECO + l
-        for l in TEX_TRANS[lang][1:]
-    ]
-    TEX_TRANS[lang] = "\n".join(TEX_TRANS[lang])
+    for lang, blocks in model["blocks"].items():
+        TEX_TRANS[lang] = []
+
+        for kind, trans in blocks:
+            TEX_TRANS[lang] += texify(kind, trans)
+
+            all_trans[lang].update(trans)
+
+        TEX_TRANS[lang] = [
+            l if l.startswith("%") else DECO + l
+            for l in TEX_TRANS[lang][1:]
+        ]
+        TEX_TRANS[lang] = "\n".join(TEX_TRANS[lang])
+
+    return TEX_TRANS, all_trans
+
+
+# ------------------------------- #
+# -- CACHE OF THE PARSED PEUFS -- #
+# ------------------------------- #
+
+# The key depends on this builder because "normalize" and "texify" change
+# what is stored.
+def peufkey(lang_peuf_dir = LANG_PEUF_DIR):
+    hasher = hashlib.sha256()
+
+    hasher.update(filehash(__file__).encode("utf-8"))
+
+    for peufpath in scanfiles(lang_peuf_dir, ".peuf"):
+        hasher.update(
+            (peufpath - lang_peuf_dir).as_posix().encode("utf-8")
+        )
+        hasher.update(filehash(peufpath).encode("utf-8"))
+
+    return hasher.hexdigest()
+
+
+def read_peuf_cache(key, cache_path = PEUF_CACHE_PATH):
+    if not cache_path.is_file():
+        return None
+
+    try:
+        with open(cache_path, encoding = "utf-8") as jsonfile:
+            content = json.load(jsonfile)
+
+# A broken cache only means that the peufs will be parsed again.
+    except (ValueError, OSError):
+        return None
+
+    if content.get("key") != key:
+        return None
+
+    return content
+
+
+def write_peuf_cache(content, cache_path = PEUF_CACHE_PATH):
+    cache_path.parent.mkdir(parents = True, exist_ok = True)
+
+    tmppath = cache_path.with_suffix(".tmp")
+
+    with open(tmppath, mode = "w", encoding = "utf-8") as jsonfile:
+        json.dump(
+            content,
+            jsonfile,
+            ensure_ascii = False,
+            separators   = (",", ":")
+        )
+
+    os.replace(tmppath, cache_path)
+
+
+def load_peufs(
+    langs,
+    lang_peuf_dir = LANG_PEUF_DIR,
+    docpeuf_path  = DOC_PEUF_PATH,
+    cache_path    = PEUF_CACHE_PATH
+):
+    key     = peufkey(lang_peuf_dir)
+    content = read_peuf_cache(key, cache_path)
+
+    if content is None \
+    or sorted(content["model"]["blocks"]) != sorted(langs):
+        peuftitles, docinfos = read_docinfos(docpeuf_path)
+
+        content = {
+            "key"       : key,
+            "model"     : build_model(langs, lang_peuf_dir),
+            "peuftitles": peuftitles,
+            "docinfos"  : docinfos,
+        }
+
+        write_peuf_cache(content, cache_path)
+
+        print(f"{DECO}* Peuf files parsed.")
+
+    else:
+        for blocks in content["model"]["blocks"].values():
+            for _, trans in blocks:
+                ALL_MACROS.update(trans)
+
+        print(f"{DECO}* Peuf files unchanged : parsed data taken from the cache.")
+
+    return content["model"], content["peuftitles"], content["docinfos"]
 
 
 # -------------------- #
 # -- TEXTUAL MACROS -- #
 # -------------------- #
 
-stytxtmacros = defaultdict(list)
-latexmacros  = defaultdict(list)
-
-for lang in ALL_TRANS:
-    for prefix in ["TT", "AL"]:
-        for control, extras in {
-            "If"    : ["Else"],
-            "For"   : [],
-            "While" : [],
-            "Repeat": ["Until"],
-            "Switch": ["Case"],
-        }.items():
-            macroname = f"{prefix}{control.lower()}"
-
-            if lang == "english":
-                latexmacros[prefix].append(macroname)
-
-            macrotxt  = [ ALL_TRANS[lang][control] ]
-            macrotxt += [
-                ALL_TRANS[lang][e]
-                for e in extras
-            ]
+def build_textual_macros(all_trans):
+    stytxtmacros = defaultdict(list)
+    latexmacros  = defaultdict(list)
+
+    for lang in all_trans:
+        for prefix in ["TT", "AL"]:
+            for control, extras in {
+                "If"    : ["Else"],
+                "For"   : [],
+                "While" : [],
+                "Repeat": ["Until"],
+                "Switch": ["Case"],
+            }.items():
+                macroname = f"{prefix}{control.lower()}"
+
+                if lang == "english":
+                    latexmacros[prefix].append(macroname)
+
+                macrotxt  = [ all_trans[lang][control] ]
+                macrotxt += [
+                    all_trans[lang][e]
+                    for e in extras
+                ]
+
+                if control == "If":
+                    macrotxt = "\\,--\\,".join(macrotxt)
 
-            if control == "If":
-                macrotxt = "\\,--\\,".join(macrotxt)
+                else:
+                    macrotxt = " ".join(macrotxt)
 
-            else:
-                macrotxt = " ".join(macrotxt)
+                if prefix == "TT":
+                    formatter = "texttt"
+                    macrotxt = macrotxt.upper()
 
-            if prefix == "TT":
-                formatter = "texttt"
-                macrotxt = macrotxt.upper()
+                else:
+                    formatter = "textbf"
 
-            else:
-                formatter = "textbf"
+                stytxtmacros[lang].append(
+                    f"\\newcommand\\{macroname}{{\\{formatter}{{{macrotxt}}}}}"
+                )
 
-            stytxtmacros[lang].append(
-                f"\\newcommand\\{macroname}{{\\{formatter}{{{macrotxt}}}}}"
-            )
+        stytxtmacros[lang] = DECO + "\n    ".join(stytxtmacros[lang])
 
-    stytxtmacros[lang] = DECO + "\n    ".join(stytxtmacros[lang])
+    return stytxtmacros, latexmacros
 
 
 # -------------------- #
 # -- BUILD LANG STY -- #
 # -------------------- #
 
-for lang, tex_trans in TEX_TRANS.items():
-    with open(
-        file     = KEYWORDS_DIR / f"{lang}.sty",
-        mode     = 'w',
-        encoding = 'utf-8'
-    ) as texlang:
-        texlang.write(f"""
+@traced("sty writing", cat = "write")
+def write_lang_sty(
+    tex_trans_by_lang,
+    stytxtmacros,
+    outputs,
+    keywords_dir = KEYWORDS_DIR
+):
+    for lang, tex_trans in tex_trans_by_lang.items():
+        outputs.write(
+            keywords_dir / f"{lang}.sty",
+            f"""
 \\newcommand\\uselang{lang}{{
 % Textual versions
 {stytxtmacros[lang]}
 
 {tex_trans}
 }}
-        """.lstrip())
+        """.lstrip()
+        )
+
+
+# ----------------------------- #
+# -- LAZY LOADING OF THE STY -- #
+# ----------------------------- #
+
+def update_lazy_langs(langs, outputs, sty_file = STY_FILE):
+    with open(
+        file     = sty_file,
+        mode     = 'r',
+        encoding = 'utf-8'
+    ) as styfile:
+        with span("between", cat = "parse", file = sty_file.name):
+            text_start, _, text_end = between(
+                text = styfile.read(),
+                seps = [
+                    "% == Lazy languages - START == %\n",
+                    "\n% == Lazy languages - END == %"
+                ],
+                keepseps = True
+            )
+
+    stubs = "\n".join(
+        f"\\newcommand\\uselang{lang}"
+        f"{{\\lyalgo@loadlang{{{lang}}}\\uselang{lang}}}"
+        for lang in sorted(langs)
+    )
+
+    outputs.write(sty_file, text_start + stubs + text_end)
 
 
 # --------------------------------------- #
 # -- COPY LANG STY TO THE FINAL FOLDER -- #
 # --------------------------------------- #
 
-KEYWORDS_FINAL_DIR.create("dir")
-
-for peufpath in (KEYWORDS_DIR).walk("file::*.sty"):
-    peufpath.copy_to(
-        dest     = KEYWORDS_FINAL_DIR / peufpath.name,
-        safemode = False
-    )
+@traced("sty copying", cat = "fs")
+def copy_lang_sty(
+    outputs,
+    keywords_dir       = KEYWORDS_DIR,
+    keywords_final_dir = KEYWORDS_FINAL_DIR
+):
+    for peufpath in scanfiles(keywords_dir, ".sty"):
+        if peufpath.parent != keywords_dir:
+            continue
+
+        outputs.copy(
+            source = peufpath,
+            dest   = keywords_final_dir / peufpath.name
+        )
 
 
 # ------------------------- #
 # -- TEMPLATES TO UPDATE -- #
 # ------------------------- #
 
-with open(
-    file     = TEX_FILE,
-    mode     = 'r',
-    encoding = 'utf-8'
-) as docfile:
-    template_tex = docfile.read()
-
+@traced("peuf parsing", cat = "parse")
+def read_docinfos(docpeuf_path):
+    from orpyste.data import ReadBlock
 
-with ReadBlock(
-    content = KEYWORDS_DIR / "config" / "for-doc[fr].peuf",
-    mode    = {
-        'verbatim'  : ":default:",
-        'keyval:: =': "titles",
-    }
-) as data:
-    docinfos = data.mydict("std mini")
-
-    peuftitles = docinfos["titles"]
-    del docinfos["titles"]
+    with ReadBlock(
+        content = docpeuf_path,
+        mode    = {
+            'verbatim'  : ":default:",
+            'keyval:: =': "titles",
+        }
+    ) as data:
+        docinfos = data.mydict("std mini")
 
+        peuftitles = docinfos["titles"]
+        del docinfos["titles"]
 
-with open(
-    file     = KEYWORDS_DIR / "english.sty",
-    mode     = 'r',
-    encoding = 'utf-8'
-) as docfile:
-    lang_sty = docfile.read()
+    return peuftitles, docinfos
 
 
 # --------------------------------------- #
 # -- PREPARING THE UPDATING OF THE DOC -- #
 # --------------------------------------- #
 
-allmacros = {}
-
-pattern_kwmacro = re.compile("\\SetKw(.*?)\{(.*?)\}")
-
-for oneline in lang_sty.split("\n"):
-    match = re.search(pattern_kwmacro, oneline)
-
-    if match:
-        allmacros[kind].append(match.group(2))
-
-    elif oneline.startswith("%"):
-        kind = oneline[1:].strip().lower()
-
-        if kind not in allmacros:
-            allmacros[kind] = []
-
+def build_latexcodes(model, peuftitles):
+# Some macros are consumed below.
+    allmacros = {
+        kind: list(macros)
+        for kind, macros in model["kinds"].items()
+    }
 
-latexcodes = defaultdict(list)
+    latexcodes = defaultdict(list)
 
-for kind in peuftitles:
-    macros = allmacros[kind]
+    for kind in peuftitles:
+        macros = allmacros[kind]
 
-    if kind == "input":
-        lastmacro = ""
-        noplurial = []
+        if kind == "input":
+            lastmacro = ""
+            noplurial = []
 
 # No need to show the plurial forms.
-        for onemacro in macros:
-            if noplurial \
-            and onemacro.startswith(noplurial[-1]):
-                continue
+            for onemacro in macros:
+                if noplurial \
+                and onemacro.startswith(noplurial[-1]):
+                    continue
 
-            noplurial.append(onemacro)
+                noplurial.append(onemacro)
 
-        for i, word in enumerate(noplurial[::2]):
-            nextword = noplurial[2*i+1]
+            for i, word in enumerate(noplurial[::2]):
+                nextword = noplurial[2*i+1]
 
-            exafilename = f"{word}-{nextword}"
-            texcodes = [
-                f"\\{word}{{donnée 1}}",
-                f"\\{nextword}{{donnée 2}}"
-            ]
+                exafilename = f"{word}-{nextword}"
+                texcodes = [
+                    f"\\{word}{{donnée 1}}",
+                    f"\\{nextword}{{donnée 2}}"
+                ]
 
-            latexcodes[kind].append((exafilename, texcodes))
+                latexcodes[kind].append((exafilename, texcodes))
 
 # Other kind of keywords use the same behavior contrary to the input ones.
-        continue
+            continue
 
 
-    elif kind == "block":
-        nbexa    = 0
-        texcodes = []
+        elif kind == "block":
+            nbexa    = 0
+            texcodes = []
 
-        for onemacro in macros:
-            nbexa += 1
+            for onemacro in macros:
+                nbexa += 1
 
-            texcodes += [
-                "",
-                f"% Possibilité {nbexa}",
-                f"\\{onemacro}{{Instruction {nbexa}}}"
-            ]
+                texcodes += [
+                    "",
+                    f"% Possibilité {nbexa}",
+                    f"\\{onemacro}{{Instruction {nbexa}}}"
+                ]
 
-        exafilename = f"main-{kind}"
-        texcodes = texcodes[1:]
+            exafilename = f"main-{kind}"
+            texcodes = texcodes[1:]
 
 
-    elif kind in ["for", "repeat"]:
-        nbexa     = 0
+        elif kind in ["for", "repeat"]:
+            nbexa     = 0
 
-        for onemacro in macros:
-            nbexa   += 1
-            texcodes = []
+            for onemacro in macros:
+                nbexa   += 1
+                texcodes = []
 
-            if kind == "repeat":
-                nbexa = ""
+                if kind == "repeat":
+                    nbexa = ""
 
-            texcodes += [
-                f"\\{onemacro}{{$i \\in uneliste$}}{{",
-                " "*2 + f"Instruction {nbexa}",
-                "}"
-            ]
+                texcodes += [
+                    f"\\{onemacro}{{$i \\in uneliste$}}{{",
+                    " "*2 + f"Instruction {nbexa}",
+                    "}"
+                ]
 
-            exafilename = f"{onemacro}-loop"
+                exafilename = f"{onemacro}-loop"
 
-            latexcodes[kind].append((exafilename, texcodes))
+                latexcodes[kind].append((exafilename, texcodes))
 
 # Other kind of keywords use the same behavior contrary to the input ones.
-        continue
+            continue
 
 
-    elif kind == "switch":
-        texcodes = ["\\Switch{$i$}{"]
+        elif kind == "switch":
+            texcodes = ["\\Switch{$i$}{"]
 
-        prefix = "u"
+            prefix = "u"
 
-        for i in range(1, 4):
-            if i == 3:
-                prefix = ""
+            for i in range(1, 4):
+                if i == 3:
+                    prefix = ""
 
-            texcodes.append(
-                " "*2 + f"\\{prefix}Case{{$i = {i-1}$}}{{Instruction {i}}}"
-            )
+                texcodes.append(
+                    " "*2 + f"\\{prefix}Case{{$i = {i-1}$}}{{Instruction {i}}}"
+                )
 
-        texcodes.append("}")
+            texcodes.append("}")
 
-        exafilename = kind
+            exafilename = kind
 
 
-    elif kind == "ifelif":
-        exafilename = kind
-
-        texcodes = [
-            "\\uIf{$i = 0$}{",
-            "  Instruction 1",
-            "}",
-            "\\uElseIf{$i = 1$}{",
-            "  Instruction 2",
-            "}",
-            "\\Else{",
-            "  Instruction 3",
-            "}"
-        ]
+        elif kind == "ifelif":
+            exafilename = kind
 
-    else:
-        prefix   = ""
+            texcodes = [
+                "\\uIf{$i = 0$}{",
+                "  Instruction 1",
+                "}",
+                "\\uElseIf{$i = 1$}{",
+                "  Instruction 2",
+                "}",
+                "\\Else{",
+                "  Instruction 3",
+                "}"
+            ]
 
-        texcodes = []
+        else:
+            prefix   = ""
 
-        while macros:
-            word      = macros.pop(0)
-            wordlower = word.lower()
+            texcodes = []
 
-            if wordlower == "and":
-                wordbis = macros.pop(0)
-                texcodes.append(f"{prefix}A \\{word} B \\{wordbis} C")
+            while macros:
+                word      = macros.pop(0)
+                wordlower = word.lower()
 
-            elif wordlower in ["ask", "print"]:
-                texcodes.append(f"{prefix}\\{word} \"Quelque chose\"")
+                if wordlower == "and":
+                    wordbis = macros.pop(0)
+                    texcodes.append(f"{prefix}A \\{word} B \\{wordbis} C")
 
-            elif wordlower == "return":
-                texcodes.append(f"{prefix}\\{word} RÉSULTAT")
+                elif wordlower in ["ask", "print"]:
+                    texcodes.append(f"{prefix}\\{word} \"Quelque chose\"")
 
-            elif wordlower.endswith("from"):
-                wordbis = macros.pop(0)
-                texcodes.append(f"{prefix}$k$ \\{word} $1$ \\{wordbis} $n$")
+                elif wordlower == "return":
+                    texcodes.append(f"{prefix}\\{word} RÉSULTAT")
 
-            elif wordlower == "inthis":
-                texcodes.append(f"{prefix}$e$ \\{word}" + " $\{ 1 , 4 , 16 \}$")
+                elif wordlower.endswith("from"):
+                    wordbis = macros.pop(0)
+                    texcodes.append(f"{prefix}$k$ \\{word} $1$ \\{wordbis} $n$")
 
-            else:
-                texcodes.append(f"{prefix}$L$ \\{word}")
+                elif wordlower == "inthis":
+                    texcodes.append(f"{prefix}$e$ \\{word}" + " $\{ 1 , 4 , 16 \}$")
+
+                else:
+                    texcodes.append(f"{prefix}$L$ \\{word}")
 
-            if not prefix:
-                prefix = r"\\ "
+                if not prefix:
+                    prefix = r"\\ "
 
-        exafilename = kind
+            exafilename = kind
 
 # We can store...
-    latexcodes[kind].append((exafilename, texcodes))
+        latexcodes[kind].append((exafilename, texcodes))
 
-for kind in latexcodes:
-    print()
-    print(kind)
-    for l in latexcodes[kind]:
-        print(l)
+    for kind in latexcodes:
+        print()
+        print(kind)
+        for l in latexcodes[kind]:
+            print(l)
 
 # Just normalisze all.
-for kind, metas in latexcodes.items():
-    for i, (exafilename, onetexcode) in enumerate(metas):
-        exafilename = exafilename.lower()
-        onetexcode  = LATEX_N_OUPUT_TEMP.format(
-            latexcode = " "*2 + "\n  ".join(onetexcode)
-        )
+    for kind, metas in latexcodes.items():
+        for i, (exafilename, onetexcode) in enumerate(metas):
+            exafilename = exafilename.lower()
+            onetexcode  = LATEX_N_OUPUT_TEMP.format(
+                latexcode = " "*2 + "\n  ".join(onetexcode)
+            )
 
-        metas[i] = (exafilename, onetexcode)
+            metas[i] = (exafilename, onetexcode)
 
-    latexcodes[kind] = metas
+        latexcodes[kind] = metas
+
+    return latexcodes
 
 
 # ------------------------------ #
 # -- USEFUL TEXT MACROS - DOC -- #
 # ------------------------------ #
 
-text_start, _, text_end = between(
-    text = template_tex,
-    seps = [
-        "% == Text tools - START == %\n",
-        "\n% == Text tools - END == %"
-    ],
-    keepseps = True
-)
-
-texcode = []
-
-for prefix, kind in [
-    ("TT", "True Type"),
-    ("AL", "algorithme"),
-]:
-    texcode += [
-        f"""
+def update_text_tools(template_tex, latexmacros):
+    with span("between", cat = "parse"):
+        text_start, _, text_end = between(
+            text = template_tex,
+            seps = [
+                "% == Text tools - START == %\n",
+                "\n% == Text tools - END == %"
+            ],
+            keepseps = True
+        )
+
+    texcode = []
+
+    for prefix, kind in [
+        ("TT", "True Type"),
+        ("AL", "algorithme"),
+    ]:
+        texcode += [
+            f"""
 \\begin{{center}}
 	Liste des commandes de type \myquote{{{kind}}}.
 \\end{{center}}
 
 \\begin{{enumerate}}
-        """.rstrip()
-    ]
+            """.rstrip()
+        ]
+
+        for macroname in latexmacros[prefix]:
+            texcode.append(
+                f"{DECO}\\item \\verb+\\{macroname}+ "
+                f"donne \\{macroname}."
+            )
 
-    for macroname in latexmacros[prefix]:
         texcode.append(
-            f"{DECO}\\item \\verb+\\{macroname}+ "
-            f"donne \\{macroname}."
+            "\\end{enumerate}"
         )
 
-    texcode.append(
-        "\\end{enumerate}"
-    )
-
-texcode = "\n".join(texcode + [""])
+    texcode = "\n".join(texcode + [""])
 
-template_tex = text_start + texcode + text_end
+    return text_start + texcode + text_end
 
 
 # ------------------------ #
 # -- THE EXAMPLES - DOC -- #
 # ------------------------ #
 
-text_start, _, text_end = between(
-    text = template_tex,
-    seps = [
-        "% == Block and words tools - START == %\n",
-        "\n% == Block and words tools - END == %"
-    ],
-    keepseps = True
-)
-
-texdoc = []
+def update_examples(
+    template_tex,
+    latexcodes,
+    peuftitles,
+    docinfos,
+    outputs,
+    this_exa_dir = THIS_EXA_DIR
+):
+    with span("between", cat = "parse"):
+        text_start, _, text_end = between(
+            text = template_tex,
+            seps = [
+                "% == Block and words tools - START == %\n",
+                "\n% == Block and words tools - END == %"
+            ],
+            keepseps = True
+        )
 
+    texdoc = []
 
-for kind, metas in latexcodes.items():
-    explanations = "\n".join(docinfos[kind])
+    for kind, metas in latexcodes.items():
+        explanations = "\n".join(docinfos[kind])
 
-    texdoc.append(
+        texdoc.append(
 f"""
 \\subsubsection{{{peuftitles[kind]}}}
 
 {explanations}
 
 """
-    )
+        )
 
-    for (exafilename, onetexcode) in metas:
-        texdoc.append(
+        for (exafilename, onetexcode) in metas:
+            texdoc.append(
 f"\\codeasideoutput{{examples/algo-basic/additional-macros/{exafilename}.tex}}"
-        )
+            )
 
-        pathfile = THIS_EXA_DIR / f"{exafilename}.tex"
-        pathfile.create(
-            kind = 'file',
-        )
+            outputs.write(
+                this_exa_dir / f"{exafilename}.tex",
+                onetexcode
+            )
+
+    texdoc = "\n".join(texdoc + [""])
 
-        with open(
-            file     = pathfile,
-            mode     = 'w',
-            encoding = 'utf-8'
-        ) as texfile:
-            texfile.write(onetexcode)
+    return text_start + texdoc + text_end
 
-texdoc = "\n".join(texdoc + [""])
 
-template_tex = text_start + texdoc + text_end
+# ----------------- #
+# -- THE BUILDER -- #
+# ----------------- #
+
+def build(
+    lang_peuf_dir      = LANG_PEUF_DIR,
+    keywords_dir       = KEYWORDS_DIR,
+    keywords_final_dir = KEYWORDS_FINAL_DIR,
+    tex_file           = TEX_FILE,
+    this_exa_dir       = THIS_EXA_DIR,
+    sty_file           = STY_FILE
+):
+    langs = find_langs(lang_peuf_dir)
+
+    model, peuftitles, docinfos = load_peufs(
+        langs         = langs,
+        lang_peuf_dir = lang_peuf_dir,
+        docpeuf_path  = lang_peuf_dir / "for-doc[fr].peuf"
+    )
+
+    tex_trans_by_lang, all_trans = build_lang_specs(model)
+
+    stytxtmacros, latexmacros = build_textual_macros(all_trans)
+
+    outputs = Outputs()
+
+    write_lang_sty(tex_trans_by_lang, stytxtmacros, outputs, keywords_dir)
+    copy_lang_sty(outputs, keywords_dir, keywords_final_dir)
+
+    update_lazy_langs(langs, outputs, sty_file)
+
+    with open(
+        file     = tex_file,
+        mode     = 'r',
+        encoding = 'utf-8'
+    ) as docfile:
+        template_tex = docfile.read()
+
+    latexcodes = build_latexcodes(model, peuftitles)
+
+    template_tex = update_text_tools(template_tex, latexmacros)
+
+    template_tex = update_examples(
+        template_tex = template_tex,
+        latexcodes   = latexcodes,
+        peuftitles   = peuftitles,
+        docinfos     = docinfos,
+        outputs      = outputs,
+        this_exa_dir = this_exa_dir
+    )
 
 
 # ----------------------------- #
 # -- UPDATING THE LATEX FILE -- #
 # ----------------------------- #
 
-with open(
-    file     = TEX_FILE,
-    mode     = 'w',
-    encoding = 'utf-8'
-) as docfile:
-    docfile.write(template_tex)
+    outputs.write(tex_file, template_tex)
+
+    print(f"{DECO}* {outputs.summary()}")
+
+    return outputs.paths
+
+
+if __name__ == "__main__":
+    build()
@@ -0,0 +1,214 @@
+#! /usr/bin/env python3
+
+# Benchmarks of the builders and of ``lyalgo.sty`` : see the module
+# ``tools.bench``. The caches of the factory are moved aside during the cold
+# runs, and then put back.
+#
+# The command fails if a metric regresses, or if a builder or a compilation
+# fails.
+
+from argparse import ArgumentParser
+import sys
+
+from mistool.os_use import PPath
+
+from tools.bench import (
+    benchbuilders,
+    benchpdflatex,
+    compare,
+    HISTORY_PATH,
+    MIN_DELTA,
+    readhistory,
+    REPEAT,
+    savehistory,
+    THRESHOLD,
+    TIMEOUT
+)
+
+
+# ----------------------- #
+# -- TOOLS & CONSTANTS -- #
+# ----------------------- #
+
+DECO = " "*4
+
+KINDS = ["builders", "pdflatex"]
+
+
+def showmetric(metric, onetime):
+    if onetime is None:
+        print(f"{DECO}* [FAILED] {metric}")
+
+    else:
+        print(f"{DECO}* {metric} : {onetime:.2f} s")
+
+
+def showresults(results):
+    width = max(len(result["metric"]) for result in results)
+
+    for result in results:
+        line = f"{DECO}{result['metric']:<{width}}  {result['value']:8.2f} s"
+
+        if result["baseline"] is not None:
+            line += (
+                f"  {result['baseline']:8.2f} s"
+                f"  {result['change']:+7.1%}"
+            )
+
+        if result["regressed"]:
+            line += "  REGRESSION"
+
+        print(line)
+
+
+# -------------------- #
+# -- THE BENCHMARKS -- #
+# -------------------- #
+
+def bench(
+    kinds     = KINDS,
+    repeat    = REPEAT,
+    timeout   = TIMEOUT,
+    jobs      = 1,
+    withdocs  = True,
+    threshold = THRESHOLD,
+    mindelta  = MIN_DELTA,
+    history   = HISTORY_PATH,
+    save      = True
+):
+    metrics = {}
+    failed  = []
+
+    if "builders" in kinds:
+        print("+ Cold and warm runs of the builders.")
+
+        onemetrics, onefailed = benchbuilders(
+            repeat   = repeat,
+            timeout  = timeout,
+            options  = {"build-02-doc": {"jobs": jobs}},
+            onmetric = showmetric
+        )
+
+        metrics.update(onemetrics)
+        failed += onefailed
+
+    if "pdflatex" in kinds:
+        print("+ Compilations of the reference documents.")
+
+        onemetrics, onefailed = benchpdflatex(
+            repeat   = repeat,
+            timeout  = timeout,
+            withdocs = withdocs,
+            onmetric = showmetric
+        )
+
+        metrics.update(onemetrics)
+        failed += onefailed
+
+    results = compare(
+        metrics   = metrics,
+        history   = readhistory(history),
+        threshold = threshold,
+        mindelta  = mindelta
+    )
+
+    if results:
+        print("+ Metrics, baselines and changes.")
+
+        showresults(results)
+
+    if save:
+        savehistory(metrics, failed, history)
+
+        print(f"+ History updated : << {history.name} >>.")
+
+    return results, failed
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(
+        description = "Time the builders and pdflatex on reference documents."
+    )
+
+    parser.add_argument(
+        "--only",
+        choices = KINDS,
+        action  = "append",
+        dest    = "kinds",
+        help    = "benchmarks to run, all of them by default."
+    )
+
+    parser.add_argument(
+        "--repeat",
+        type    = int,
+        default = REPEAT,
+        help    = "number of warm runs, the best one is kept."
+    )
+
+    parser.add_argument(
+        "--timeout",
+        type    = float,
+        default = TIMEOUT,
+        help    = "seconds given to one run."
+    )
+
+    parser.add_argument(
+        "--jobs", "-j",
+        type    = int,
+        default = 1,
+        help    = "number of jobs given to the builder of the doc."
+    )
+
+    parser.add_argument(
+        "--no-doc",
+        action = "store_true",
+        help   = "do not time the compilation of the docs."
+    )
+
+    parser.add_argument(
+        "--threshold",
+        type    = float,
+        default = THRESHOLD,
+        help    = "ratio of slowing down making a regression."
+    )
+
+    parser.add_argument(
+        "--min-delta",
+        type    = float,
+        default = MIN_DELTA,
+        help    = "seconds of slowing down below which nothing regresses."
+    )
+
+    parser.add_argument(
+        "--history",
+        default = HISTORY_PATH,
+        help    = "JSON file of the history."
+    )
+
+    parser.add_argument(
+        "--no-save",
+        action = "store_true",
+        help   = "do not add this run to the history."
+    )
+
+    ARGS = parser.parse_args()
+
+    results, failed = bench(
+        kinds     = ARGS.kinds or KINDS,
+        repeat    = ARGS.repeat,
+        timeout   = ARGS.timeout,
+        jobs      = ARGS.jobs,
+        withdocs  = not ARGS.no_doc,
+        threshold = ARGS.threshold,
+        mindelta  = ARGS.min_delta,
+        history   = PPath(ARGS.history),
+        save      = not ARGS.no_save
+    )
+
+    regressed = [result["metric"] for result in results if result["regressed"]]
+
+    if failed:
+        sys.exit(f"+ Some runs have failed : {', '.join(failed)}.")
+
+    if regressed:
+        sys.exit(f"+ Some metrics regress : {', '.join(regressed)}.")
@@ -5,7 +5,10 @@ from collections import defaultdict
 from mistool.os_use import PPath
 from mistool.string_use import between, joinand
 from mistool.term_use import ALL_FRAMES, withframe
-from orpyste.data import ReadBlock
+
+from tools.output import Outputs
+from tools.scan import Scan
+from tools.trace import span, traced
 
 # ----------------------- #
 # -- TOOLS & CONSTANTS -- #
@@ -13,7 +16,17 @@ from orpyste.data import ReadBlock
 
 THIS_DIR = PPath( __file__ ).parent
 
-STY_PATH   = THIS_DIR.parent / "lyalgo" / "lyalgo.sty"
+LYALGO_DIR = THIS_DIR.parent / "lyalgo"
+STY_PATH   = LYALGO_DIR / "lyalgo.sty"
+
+# Each numbered folder gives one module "lyalgo-<name>.sty" where the digits
+# have been removed. The modules below are only loaded by an option of
+# "lyalgo.sty", the other ones are always loaded.
+OPTIONAL_MODULES = {
+    "pseudo-verb"    : "pseudoverb",
+    "algo-additional": "additional",
+    "flowchart"      : "flowchart",
+}
 
 
 DECO = " "*4
@@ -25,7 +38,7 @@ MYFRAME = lambda x: withframe(
 
 
 def path2title(onepath):
-    onepath = relative_path.stem.replace('-', ' ').upper()
+    onepath = str(onepath).replace('-', ' ').upper()
 
     while onepath[0] in " 0123456789":
         onepath = onepath[1:]
@@ -47,7 +60,16 @@ def cleansource(text):
     return "\n".join(text)
 
 
-def organize_packages(packages):
+def modulename(latexfile):
+    name = str(latexfile.parent.name)
+
+    while name[0] in "-0123456789":
+        name = name[1:]
+
+    return name
+
+
+def organize_packages(packages, withoptions = True):
     global DECO
 
     packages_found = defaultdict(list)
@@ -81,9 +103,9 @@ def organize_packages(packages):
 
     for onename in allnames:
         options = packages_found[onename]
-        options = set(options)
+        options = sorted(set(options))
 
-        if options:
+        if options and withoptions:
             options = f'{",".join(options)}'
 
             packages_ok.append(f"\\PassOptionsToPackage{{{options}}}{{{onename}}}")
@@ -100,29 +122,34 @@ def organize_packages(packages):
 # -- NEW THINGS -- #
 # ---------------- #
 
-ALL_PACKAGES       = []
-ALL_MACROS         = []
-ALL_LOCAL_SETTINGS = []
+@traced("modules search", cat = "fs")
+def find_modules(factory_dir):
+    paths_found = []
+
+    scan = Scan.load()
+    scan.save()
 
-paths_found = []
-for subdir in THIS_DIR.walk("dir::"):
-    subdir_name = str(subdir.name)
+    for latexfile in scan.under(factory_dir):
+        latexfile   = PPath(latexfile)
+        subdir_name = str(latexfile.parent.name)
 
-    if subdir_name in [
-        "config",
-    ] or subdir_name[:2] == "x-":
-        continue
+        if latexfile.parent == factory_dir \
+        or latexfile.suffix != ".sty" \
+        or subdir_name in [
+            "config",
+        ] or subdir_name[:2] == "x-":
+            continue
 
-    for latexfile in subdir.walk("file::*.sty"):
         if latexfile.name[0] in "0123456789":
             paths_found.append(latexfile)
 
+    paths_found.sort()
+
+    return paths_found
 
-paths_found.sort()
 
-for latexfile in paths_found:
-    relative_path = latexfile - THIS_DIR
-    parentname    = latexfile.parent.name
+def read_module(latexfile, factory_dir):
+    relative_path = latexfile - factory_dir
 
     print(f"{DECO}* Analyzing << {relative_path} >>")
 
@@ -130,8 +157,11 @@ for latexfile in paths_found:
         file     = latexfile,
         encoding = "utf-8"
     ) as filetoupdate:
+        content = filetoupdate.read()
+
+    with span("between", cat = "parse", file = relative_path):
         _, packages, definitions = between(
-            text = filetoupdate.read(),
+            text = content,
             seps = [
                 "% == PACKAGES USED == %",
                 "% == DEFINITIONS == %"
@@ -139,56 +169,220 @@ for latexfile in paths_found:
             keepseps = False
         )
 
-    ALL_PACKAGES += [
+    packages = [
         x.strip()
         for x in packages.strip().split("\n")
     ]
 
-
     definitions = cleansource(definitions)
 
+    macros = []
 
     if definitions.strip():
-        if ALL_MACROS:
-            ALL_MACROS.append("\n")
-
-        ALL_MACROS += [
+        macros = [
             MYFRAME(path2title(relative_path.stem)),
             "",
             definitions
         ]
 
+    return packages, macros
 
-ALL_MACROS = "\n".join(ALL_MACROS)
 
+# --------------------- #
+# -- STY OF A MODULE -- #
+# --------------------- #
 
-# --------------------------------- #
-# -- ORGANIZING LIST OF PACKAGES -- #
-# --------------------------------- #
+def module_source(name, packages, macros):
+    packages = "\n".join(
+        organize_packages(packages, withoptions = False)
+    )
 
-ALL_PACKAGES = organize_packages(ALL_PACKAGES)
+    return f"""\\NeedsTeXFormat{{LaTeX2e}}
+\\ProvidesPackage{{lyalgo-{name}}}
 
 
-# ------------------------------ #
-# -- UPDATE THE MAIN STY FILE -- #
-# ------------------------------ #
+{MYFRAME("PACKAGES REQUIRED")}
+
+{packages}
+
+
+{macros}
+"""
+
+
+# ----------------------- #
+# -- THE MAIN STY FILE -- #
+# ----------------------- #
+
+def main_source(modules, packages):
+    options  = [
+        OPTIONAL_MODULES[name]
+        for name in modules
+        if name in OPTIONAL_MODULES
+    ]
+
+    switches = "\n".join(
+        f"\\newif\\iflyalgo@{opt}"
+        for opt in options
+    )
+
+    declarations = "\n".join(
+        f"\\DeclareOption{{{opt}}}{{\\lyalgo@pickedtrue\\lyalgo@{opt}true}}"
+        for opt in options
+    )
+
+    allon = "".join(
+        f"\\lyalgo@{opt}true"
+        for opt in options
+    )
+
+    passoptions = "\n".join(
+        l for l in organize_packages(packages)
+        if l.startswith("\\PassOptionsToPackage")
+    )
+
+    loadings = []
+
+    for name in modules:
+        if name in OPTIONAL_MODULES:
+            loadings += [
+                f"\\iflyalgo@{OPTIONAL_MODULES[name]}",
+                f"{DECO}\\RequirePackage{{lyalgo-{name}}}",
+                "\\fi",
+            ]
+
+        else:
+            loadings.append(f"\\RequirePackage{{lyalgo-{name}}}")
+
+    loadings = "\n".join(loadings)
+
+    return f"""\\NeedsTeXFormat{{LaTeX2e}}
+\\ProvidesPackage{{lyalgo}}
+
+
+{MYFRAME("OPTIONS")}
+
+% Without any option, all the modules are loaded.
+\\newif\\iflyalgo@picked
+
+{switches}
 
-ALL_PACKAGES = "\n".join(ALL_PACKAGES)
+{declarations}
+\\DeclareOption{{all}}{{\\lyalgo@pickedtrue{allon}}}
 
-source = f"""{MYFRAME("PACKAGES REQUIRED")}
+% The option "lang=<lang>" chooses the language of the keywords. The other
+% unknown options are ignored like it is done for the ones of the class.
+\\def\\lyalgo@langkey{{lang}}
 
-{ALL_PACKAGES}
+\\def\\lyalgo@langoption#1=#2\\@nil{{%
+{DECO}\\def\\lyalgo@optkey{{#1}}%
+{DECO}\\ifx\\lyalgo@optkey\\lyalgo@langkey
+{DECO}{DECO}\\lyalgo@setlang#2\\@nil
+{DECO}\\else
+{DECO}{DECO}\\OptionNotUsed
+{DECO}\\fi
+}}
 
+\\def\\lyalgo@setlang#1=\\@nil{{\\def\\lyalgo@lang{{#1}}}}
 
-{ALL_MACROS}
+\\DeclareOption*{{\\expandafter\\lyalgo@langoption\\CurrentOption=\\@nil}}
+
+\\ProcessOptions\\relax
+
+\\iflyalgo@picked\\else
+{DECO}{allon}
+\\fi
+
+
+{MYFRAME("OPTIONS OF PACKAGES")}
+
+{passoptions}
+
+
+{MYFRAME("MODULES")}
+
+{loadings}
 """
 
-STY_PATH.create("file")
 
-with STY_PATH.open(
-    mode     = "w",
-    encoding = "utf-8"
-) as lyxam:
-    lyxam.write(source)
+# ----------------- #
+# -- THE BUILDER -- #
+# ----------------- #
+
+def build(
+    factory_dir = THIS_DIR,
+    sty_path    = STY_PATH
+):
+    ALL_PACKAGES = []
+    MODULES      = defaultdict(lambda: ([], []))
+
+    for latexfile in find_modules(factory_dir):
+        packages, macros = read_module(latexfile, factory_dir)
+
+        ALL_PACKAGES += packages
+
+        modpackages, modmacros = MODULES[modulename(latexfile)]
+
+        modpackages += packages
+
+        if macros:
+            if modmacros:
+                modmacros.append("\n")
+
+            modmacros += macros
+
+
+# ----------------------------- #
+# -- UPDATE THE MODULE FILES -- #
+# ----------------------------- #
+
+    outputs = Outputs()
+
+    for name, (packages, macros) in MODULES.items():
+        modpath = sty_path.parent / f"lyalgo-{name}.sty"
+
+        with span("sty writing", cat = "write", file = modpath.name):
+            changed = outputs.write(
+                modpath,
+                module_source(name, packages, "\n".join(macros))
+            )
+
+        if changed:
+            print(f"{DECO}* Update of << {modpath.name} >> done.")
+
+# Modules that no longer exist.
+    scan = Scan.load()
+    scan.save()
+
+    for oldpath in scan.under(sty_path.parent):
+        oldpath = PPath(oldpath)
+
+        if oldpath.parent == sty_path.parent \
+        and oldpath.name.startswith("lyalgo-") \
+        and oldpath.suffix == ".sty" \
+        and oldpath not in outputs.paths:
+            oldpath.remove()
+
+            print(f"{DECO}* << {oldpath.name} >> removed.")
+
+
+# ------------------------------ #
+# -- UPDATE THE MAIN STY FILE -- #
+# ------------------------------ #
+
+    with span("sty writing", cat = "write", file = sty_path.name):
+        changed = outputs.write(
+            sty_path,
+            main_source(list(MODULES), ALL_PACKAGES)
+        )
+
+    if changed:
+        print(f"{DECO}* Update of << {sty_path.name} >> done.")
+
+    print(f"{DECO}* {outputs.summary()}")
+
+    return outputs.paths
+
 
-print(f"{DECO}* Update of << {STY_PATH.name} >> done.")
+if __name__ == "__main__":
+    build()
@@ -1,19 +1,66 @@
 #! /usr/bin/env python3
 
+# One doc for each template ``config/doc[<lang>].tex``.
+#
+# The examples are copied once for all the languages. Then each language is
+# an independent pipeline launched at the same time as the other ones : its
+# sources are the files ``<name>[<lang>].tex`` of the factory. The render
+# cache of the examples and the formats are shared by all the pipelines.
+#
+# With ``--externalize``, the algocharts drawn by a pass are compiled alone
+# before the next pass, several at the same time : see ``tools.external``.
+
+from argparse import ArgumentParser
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import json
+import re
+import sys
 
-from mistool.latex_use import Build, clean as latexclean
+from mistool.latex_use import clean as latexclean, EXTS_TO_CLEAN
 from mistool.os_use import cd, PPath, runthis
 from mistool.string_use import between, case, joinand, MultiReplace
 from mistool.term_use import ALL_FRAMES, withframe
-from orpyste.data import ReadBlock
+
+from tools.examples import EXA_CACHE_DIR, renderall
+from tools.external import (
+    compilepending,
+    figuredir,
+    pendingfigures,
+    writeconfig
+)
+from tools.include import (
+    DOC_CACHE_DIR,
+    globalkey,
+    restoreaux,
+    stashaux,
+    unitkey,
+    unitstobuild,
+    updatestate,
+    writeincludeonly
+)
+from tools.latex import (
+    dumpformat,
+    extractpreamble,
+    MAX_PASSES,
+    pdfcompileall,
+    PDFLATEX_OPTIONS
+)
+from tools.manifest import Manifest
+from tools.output import Outputs
+from tools.scan import Scan
+from tools.sync import syncfiles
+from tools.texlog import analysefile, errorline, logpath, savereport, summary
+from tools.trace import span, traced
 
 THIS_DIR = PPath( __file__ ).parent
 
-TEMPLATE_PATH = THIS_DIR / "config" / "doc[fr].tex"
-DIR_DOC_PATH  = THIS_DIR.parent / "lyalgo"
-DOC_PATH      = DIR_DOC_PATH / "lyalgo-doc[fr].tex"
-EXA_DIR_DEST  = DIR_DOC_PATH / "examples"
+CONFIG_DIR   = THIS_DIR / "config"
+DIR_DOC_PATH = THIS_DIR.parent / "lyalgo"
+EXA_DIR_DEST = DIR_DOC_PATH / "examples"
+UNITS_DIR    = DIR_DOC_PATH / "chapters"
+
+PATTERN_LANG = re.compile(r"\[([a-z]+)\]$")
 
 DOUBLE_BRACES = MultiReplace({
     '{': '{{',
@@ -32,72 +79,170 @@ PYFORMAT = MultiReplace({
 
 DECO = " "*4
 
+MAX_ERRORS_SHOWN = 10
+
 MYFRAME = lambda x: withframe(
     text  = x,
     frame = ALL_FRAMES['latex_pretty']
 )
 
 
+# --------------- #
+# -- LANGUAGES -- #
+# --------------- #
+
+def langof(latexfile):
+    match = PATTERN_LANG.search(latexfile.stem)
+
+    if match is None:
+        return None
+
+    return match.group(1)
+
+
+def find_langs(config_dir):
+    return sorted(
+        langof(onepath)
+        for onepath in config_dir.glob("doc[[]*].tex")
+        if langof(onepath) is not None
+    )
+
+
+def langpaths(
+    lang,
+    config_dir   = CONFIG_DIR,
+    dir_doc_path = DIR_DOC_PATH,
+    units_dir    = UNITS_DIR
+):
+    return {
+        "template": config_dir / f"doc[{lang}].tex",
+        "header"  : config_dir / f"header[{lang}].sty",
+        "doc"     : dir_doc_path / f"lyalgo-doc[{lang}].tex",
+        "units"   : units_dir / lang,
+    }
+
+
 # ------------ #
 # -- HEADER -- #
 # ------------ #
 
-with open(
-    file     = THIS_DIR / "config" / "header[fr].sty",
-    encoding = "utf-8"
-) as headerfile:
-    HEADER = headerfile.read().strip()
+def read_header(header_path):
+    with open(
+        file     = header_path,
+        encoding = "utf-8"
+    ) as headerfile:
+        return headerfile.read().strip()
 
 
 # ---------------------- #
 # -- LOOKING FOR DOCS -- #
 # ---------------------- #
 
-CONTENTS      = []
-EXAMPLE_FILES = []
-LATEXFILES    = []
+@traced("sources search", cat = "fs")
+def find_sources(factory_dir, langs):
+    EXAMPLE_FILES = []
+    LATEXFILES    = {lang: [] for lang in langs}
 
-for subdir in THIS_DIR.walk("dir::"):
-    subdir_name = str(subdir.name)
-    subdir_str  = str(subdir)
+    scan = Scan.load()
+    scan.save()
 
-    if subdir_name in ["config", "style"] \
-    or "x-" in subdir_str:
-        continue
+    for onefile in scan.under(factory_dir):
+        onefile = PPath(onefile)
+        parts   = (onefile - factory_dir).parts
+        lang    = langof(onefile) if onefile.suffix == ".tex" else None
 
-    LATEXFILES += [
-        l for l in subdir.walk("file::*\[fr\].tex")
-        if not l.stem.endswith("-nodoc[fr]")
-    ]
+# A source is a file in a sub folder, or an example of a sub folder.
+        for i, subdir_name in enumerate(parts[:-1]):
+            if subdir_name in ["config", "style"] \
+            or "x-" in subdir_name:
+                break
 
-    subdir_exa = subdir / "examples"
+            if i == len(parts) - 2 \
+            and lang in LATEXFILES \
+            and not onefile.stem.endswith(f"-nodoc[{lang}]"):
+                LATEXFILES[lang].append(onefile)
 
-    EXAMPLE_FILES += [
-        (l, subdir_exa) for l in subdir.walk("file::examples/**")
-    ]
+            if i + 1 < len(parts) - 1 and parts[i + 1] == "examples":
+                EXAMPLE_FILES.append(
+                    (onefile, factory_dir.joinpath(*parts[:i + 2]))
+                )
 
-LATEXFILES.sort()
+    for latexfiles in LATEXFILES.values():
+        latexfiles.sort()
+
+    return LATEXFILES, EXAMPLE_FILES
 
-for latexfile in LATEXFILES:
-    with latexfile.open(
-        mode     = "r",
-        encoding = "utf-8"
-    ) as texfile:
-        _, content, _ = between(
-            text = texfile.read(),
-            seps = [
-                r"\begin{document}",
-                r"\end{document}"
-            ]
-        )
+
+def extract_contents(latexfiles):
+    CONTENTS = []
+
+    for latexfile in latexfiles:
+        with latexfile.open(
+            mode     = "r",
+            encoding = "utf-8"
+        ) as texfile:
+            text = texfile.read()
+
+        with span("between", cat = "parse", file = latexfile.name):
+            _, content, _ = between(
+                text = text,
+                seps = [
+                    r"\begin{document}",
+                    r"\end{document}"
+                ]
+            )
 
         CONTENTS.append(content)
 
+    return CONTENTS
+
+
+# ------------------------------ #
+# -- ONE FILE FOR EACH SOURCE -- #
+# ------------------------------ #
+
+def unitname(latexfile):
+    stem = PATTERN_LANG.sub("", latexfile.stem)
+
+    return f"{latexfile.parent.name}--{stem}"
+
+
+@traced("units writing", cat = "write")
+def write_units(latexfiles, contents, units_dir, outputs):
+    units = {}
+
+    for latexfile, content in zip(latexfiles, contents):
+        unit = unitname(latexfile)
+
+        outputs.write(units_dir / f"{unit}.tex", content)
+
+        units[unit] = content
+
+# Sources that no longer exist.
+    for oldpath in units_dir.glob("*.tex"):
+        if oldpath.stem not in units:
+            oldpath.unlink()
 
-for peufpath, subdir_exa in EXAMPLE_FILES:
-    peufpath.copy_to(
-        dest     = EXA_DIR_DEST / (peufpath - subdir_exa),
-        safemode = False
+            print(f"{DECO}* << {oldpath.name} >> removed.")
+
+    return units
+
+
+@traced("examples copying", cat = "fs")
+def copy_examples(example_files, exa_dir_dest, outputs, hardlink = False):
+    stats = syncfiles(
+        pairs    = [
+            (peufpath, exa_dir_dest / (peufpath - subdir_exa))
+            for peufpath, subdir_exa in example_files
+        ],
+        dest_dir = exa_dir_dest,
+        outputs  = outputs,
+        hardlink = hardlink
+    )
+
+    print(
+        f"{DECO}* Examples : {stats['copied']} copied, "
+        f"{stats['unchanged']} unchanged, {stats['removed']} removed."
     )
 
 
@@ -105,50 +250,526 @@ for peufpath, subdir_exa in EXAMPLE_FILES:
 # -- UPDATE THE DOC FILE -- #
 # ------------------------- #
 
-with TEMPLATE_PATH.open(
-    mode     = "r",
-    encoding = "utf-8"
-) as docfile:
-    content = DOUBLE_BRACES(docfile.read())
-    content = PYFORMAT(content)
-    content = content.format(
-        header  = HEADER,
-        content = "\n".join(CONTENTS)
+@traced("doc writing", cat = "write")
+def update_doc(template_path, doc_path, header, units, units_dir, outputs):
+    includepath = (units_dir - doc_path.parent).as_posix()
+
+    with template_path.open(
+        mode     = "r",
+        encoding = "utf-8"
+    ) as docfile:
+        content = DOUBLE_BRACES(docfile.read())
+        content = PYFORMAT(content)
+        content = content.format(
+            header  = header,
+            content = "\n".join(
+                f"\\include{{{includepath}/{unit}}}"
+                for unit in units
+            )
+        )
+
+
+    if outputs.write(doc_path, content):
+        print(f"{DECO}* Update of << {doc_path.name} >> done.")
+
+    else:
+        print(f"{DECO}* << {doc_path.name} >> unchanged.")
+
+    return content
+
+
+# ------------------------------ #
+# -- RENDER CACHE OF EXAMPLES -- #
+# ------------------------------ #
+
+@traced("examples rendering", cat = "tex")
+def render_examples(
+    doc_path,
+    content,
+    preamble,
+    fmt  = None,
+    jobs = 1
+):
+    stats = renderall(
+        doccontent = content,
+        preamble   = preamble,
+        jobname    = doc_path.stem,
+        fmt        = fmt,
+        jobs       = jobs
+    )
+
+    print(
+        f"{DECO}* Examples of << {doc_path.name} >> : "
+        f"{stats['hits']} from the cache, "
+        f"{stats['rendered']} new, {stats['failed']} failed."
     )
 
 
-with DOC_PATH.open(
-    mode     = "w",
-    encoding = "utf-8"
-) as docfile:
-    docfile.write(content)
+# ------------------------ #
+# -- FORMAT OF PREAMBLE -- #
+# ------------------------ #
 
+def dump_preamble(doc_path, preamble, lang):
+    fmt = dumpformat(preamble, family = lang)
 
-print(f"{DECO}* Update of << {DOC_PATH.name} >> done.")
+    if fmt is None:
+        print(
+            f"{DECO}* Dump of the preamble of << {doc_path.name} >> "
+            "impossible : no format used."
+        )
+
+    else:
+        print(
+            f"{DECO}* Format << {fmt} >> used for << {doc_path.name} >>."
+        )
+
+    return fmt
 
 
 # ------------------------------- #
 # -- COMPILE ALL THE DOCS FILE -- #
 # ------------------------------- #
 
-nbrepeat = 3
+def compile_docs(
+    latexpaths,
+    jobs       = 1,
+    maxpasses  = MAX_PASSES,
+    converge   = True,
+    texinputs  = None,
+    fmts       = None,
+    auxdirs    = None,
+    openany    = False,
+    beforepass = None,
+    pending    = None
+):
+    for latexpath in latexpaths:
+        if converge:
+            print(
+                f"{DECO}* Compilations of << {latexpath.name} >> started : "
+                f"until stable, {maxpasses} times at most."
+            )
+
+        else:
+            print(
+                f"{DECO}* Compilations of << {latexpath.name} >> started : {maxpasses} times."
+            )
+
+    results = pdfcompileall(
+        texpaths   = latexpaths,
+        maxpasses  = maxpasses,
+        converge   = converge,
+        texinputs  = texinputs,
+        fmts       = fmts,
+        jobs       = jobs,
+        auxdirs    = auxdirs,
+        openany    = openany,
+        beforepass = beforepass,
+        pending    = pending
+    )
+
+    for latexpath, (_, nbpasses, _) in zip(latexpaths, results):
+        report = analysefile(logpath(latexpath))
 
-for latexpath in DIR_DOC_PATH.walk(f"file::*.tex"):
-    print(
-        f"{DECO}* Compilations of << {latexpath.name} >> started : {nbrepeat} times."
+        savereport(latexpath.stem, report, nbpasses)
+
+        if report["fatal"]:
+            print(
+                f"{DECO}* Compilation of << {latexpath.name} >> stopped "
+                f"by a fatal error after {nbpasses} pass(es)."
+            )
+
+        else:
+            print(
+                f"{DECO}* Compilation of << {latexpath.name} >> finished "
+                f"after {nbpasses} pass(es)."
+            )
+
+        print(f"{DECO}  {summary(report)}")
+
+        for error in report["errors"][:MAX_ERRORS_SHOWN]:
+            print(f"{DECO}  {errorline(error)}")
+
+    pdfs = [
+        latexpath.parent / f"{latexpath.stem}.pdf"
+        for latexpath in latexpaths
+    ]
+
+    return (
+        pdfs,
+        not any(returncode for returncode, _, _ in results),
+        [inputs for _, _, inputs in results]
     )
 
-    builder = Build(
-        ppath      = latexpath,
-        repeat     = nbrepeat,
-        showoutput = True
+
+# The other docs can be compiled at the same time, so only the extra files
+# of this doc are removed.
+@traced("cleaning", cat = "fs")
+def clean_docs(doc_path, units_dir):
+    print(f"{DECO}* Cleaning extra files of << {doc_path.name} >>.")
+
+    for ext in EXTS_TO_CLEAN:
+        extrapath = doc_path.parent / f"{doc_path.stem}.{ext}"
+
+        if extrapath.is_file():
+            extrapath.unlink()
+
+    latexclean(units_dir)
+
+
+# -------------------------- #
+# -- EXTERNALIZED FIGURES -- #
+# -------------------------- #
+
+@traced("algocharts compiling", cat = "tex")
+def compile_figures(doc_path, figdir, preamble, fmt, jobs, failed):
+    stats = compilepending(
+        figdir   = figdir,
+        preamble = preamble,
+        fmt      = fmt,
+        jobs     = jobs,
+        failed   = failed
     )
-    builder.pdf()
 
-    print(
-        f"{DECO}* Compilation of << {latexpath.name} >> finished.",
-        f"{DECO}* Cleaning extra files.",
-        sep = "\n"
+    if stats["compiled"] or stats["failed"]:
+        print(
+            f"{DECO}* Algocharts of << {doc_path.name} >> : "
+            f"{stats['compiled']} compiled, {stats['failed']} failed."
+        )
+
+
+# --------------------------- #
+# -- KEY OF A COMPILED DOC -- #
+# --------------------------- #
+
+def pdfkey(**options):
+    return json.dumps(options, sort_keys = True, default = str)
+
+
+# ------------------------------ #
+# -- ONE PIPELINE BY LANGUAGE -- #
+# ------------------------------ #
+
+@traced("language pipeline", cat = "build")
+def build_lang(
+    lang,
+    latexfiles,
+    paths,
+    manifest,
+    jobs        = 1,
+    maxpasses   = MAX_PASSES,
+    converge    = True,
+    excache     = True,
+    usefmt      = True,
+    partial     = False,
+    externalize = False
+):
+    outputs  = Outputs()
+    doc_path = paths["doc"]
+
+    units = write_units(
+        latexfiles = latexfiles,
+        contents   = extract_contents(latexfiles),
+        units_dir  = paths["units"],
+        outputs    = outputs
+    )
+
+    content = update_doc(
+        template_path = paths["template"],
+        doc_path      = doc_path,
+        header        = read_header(paths["header"]),
+        units         = units,
+        units_dir     = paths["units"],
+        outputs       = outputs
+    )
+
+    preamble = extractpreamble(content)
+    fmt      = dump_preamble(doc_path, preamble, lang) if usefmt else None
+
+# Partial build : only the sources changed since the last compilation. A
+# unit changes with its content and with the examples it shows.
+    keys = {
+        unit: unitkey(unitcontent)
+        for unit, unitcontent in units.items()
+    }
+    gkey = globalkey(preamble + "\n".join(units))
+
+    built = unitstobuild(doc_path.stem, keys, gkey) if partial else None
+
+    if built == []:
+        print(
+            f"{DECO}* Partial build of << {doc_path.name} >> : "
+            "no source has changed."
+        )
+
+        return outputs, [], True
+
+    if built is not None:
+        print(
+            f"{DECO}* Partial build of << {doc_path.name} >> : "
+            f"{len(built)} source(s) typeset, {', '.join(built)}."
+        )
+
+# Only the examples of the units typeset are needed.
+    if excache:
+        render_examples(
+            doc_path,
+            "\n".join(
+                unitcontent
+                for unit, unitcontent in units.items()
+                if built is None or unit in built
+            ),
+            preamble,
+            fmt,
+            jobs
+        )
+
+    writeincludeonly(
+        jobname = doc_path.stem,
+        units   = built,
+        unitdir = (paths["units"] - doc_path.parent).as_posix()
+    )
+
+    texinputs = [DOC_CACHE_DIR]
+
+    if excache:
+        texinputs.append(EXA_CACHE_DIR)
+
+# The figures left by the last compilation are ready before the first pass,
+# the ones drawn by a pass before the next one. A doc is not stable while
+# some figures drawn are not included : the ones that cannot be compiled
+# are always drawn.
+    figdir     = figuredir(preamble, lang) if externalize else None
+    beforepass = None
+    pending    = None
+    failed     = set()
+
+    writeconfig(doc_path.stem, figdir, lang)
+
+    if externalize:
+        compile_figures(doc_path, figdir, preamble, fmt, jobs, failed)
+
+        def beforepass(nbpass):
+            if nbpass > 1:
+                compile_figures(doc_path, figdir, preamble, fmt, jobs, failed)
+
+        def pending():
+            return any(
+                name not in failed
+                for name in pendingfigures(figdir)
+            )
+
+# Files looked for but not found are not recorded, so what decides which
+# files are read is in the key.
+    pdfpath = doc_path.parent / f"{doc_path.stem}.pdf"
+    key     = pdfkey(
+        options   = PDFLATEX_OPTIONS,
+        fmt       = fmt,
+        texinputs = texinputs,
+        built     = built,
+        figdir    = figdir
+    )
+
+    if manifest.pdfisuptodate(pdfpath, key):
+        print(
+            f"{DECO}* << {pdfpath.name} >> unchanged : no file read by its "
+            "last compilation has changed."
+        )
+
+        return outputs, [pdfpath], True
+
+    restoreaux(doc_path, paths["units"])
+
+    pdfs, success, inputs = compile_docs(
+        latexpaths = [doc_path],
+        maxpasses  = maxpasses,
+        converge   = converge,
+        texinputs  = texinputs,
+        fmts       = {doc_path.name: fmt},
+        auxdirs    = [paths["units"]],
+        openany    = externalize,
+        beforepass = beforepass,
+        pending    = pending
+    )
+
+    stashaux(doc_path, paths["units"])
+
+    clean_docs(doc_path, paths["units"])
+
+# Without more passes, the figures drawn by the last one are only compiled
+# for the next build : this PDF must not be kept as up to date.
+    uptodate = success
+
+    if externalize and pending():
+        compile_figures(doc_path, figdir, preamble, fmt, jobs, failed)
+
+        uptodate = False
+
+        print(
+            f"{DECO}* << {pdfpath.name} >> will be compiled again : "
+            "some algocharts are not included."
+        )
+
+    if uptodate:
+        updatestate(doc_path.stem, keys, gkey, built)
+        manifest.recordpdf(pdfpath, key, inputs[0])
+
+    else:
+        manifest.forgetpdf(pdfpath)
+
+    return outputs, pdfs, success
+
+
+# ----------------- #
+# -- THE BUILDER -- #
+# ----------------- #
+
+def build(
+    jobs         = 1,
+    maxpasses    = MAX_PASSES,
+    converge     = True,
+    excache      = True,
+    usefmt       = True,
+    hardlink     = False,
+    partial      = False,
+    externalize  = False,
+    langs        = None,
+    factory_dir  = THIS_DIR,
+    config_dir   = CONFIG_DIR,
+    dir_doc_path = DIR_DOC_PATH,
+    exa_dir_dest = EXA_DIR_DEST,
+    units_dir    = UNITS_DIR
+):
+    langs = langs or find_langs(config_dir)
+
+    latexfiles, example_files = find_sources(factory_dir, langs)
+
+# Work shared by all the languages.
+    outputs = Outputs()
+
+    copy_examples(example_files, exa_dir_dest, outputs, hardlink)
+
+# One pipeline for each language, all of them at the same time. The jobs
+# are shared between the pipelines.
+    manifest = Manifest()
+
+    print(f"{DECO}* Docs built for {joinand(langs)}.")
+
+    with ThreadPoolExecutor(max_workers = max(1, len(langs))) as pool:
+        results = list(
+            pool.map(
+                lambda lang: build_lang(
+                    lang        = lang,
+                    latexfiles  = latexfiles[lang],
+                    paths       = langpaths(
+                        lang, config_dir, dir_doc_path, units_dir
+                    ),
+                    manifest    = manifest,
+                    jobs        = max(1, jobs // max(1, len(langs))),
+                    maxpasses   = maxpasses,
+                    converge    = converge,
+                    excache     = excache,
+                    usefmt      = usefmt,
+                    partial     = partial,
+                    externalize = externalize
+                ),
+                langs
+            )
+        )
+
+    manifest.save()
+
+    pdfs   = []
+    failed = []
+
+    for lang, (langoutputs, langpdfs, success) in zip(langs, results):
+        outputs.extend(langoutputs)
+        pdfs += langpdfs
+
+        if not success:
+            failed.append(lang)
+
+    print(f"{DECO}* {outputs.summary()}")
+
+# A failed compilation must stop the steps depending on the doc, and the
+# step must not be recorded as done.
+    if failed:
+        print(f"+ Compilation failed for {joinand(failed)}.")
+
+        sys.exit(1)
+
+    return outputs.paths + pdfs
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+
+    parser.add_argument(
+        "--jobs", "-j",
+        type    = int,
+        default = 1,
+        help    = "number of examples typeset at the same time."
     )
 
-latexclean(DIR_DOC_PATH)
+    parser.add_argument(
+        "--maxpasses",
+        type    = int,
+        default = MAX_PASSES,
+        help    = "maximum number of compilations of one document."
+    )
+
+    parser.add_argument(
+        "--no-converge",
+        action = "store_true",
+        help   = "always do the maximum number of compilations."
+    )
+
+    parser.add_argument(
+        "--no-excache",
+        action = "store_true",
+        help   = "typeset the examples inside the doc, without the cache."
+    )
+
+    parser.add_argument(
+        "--no-fmt",
+        action = "store_true",
+        help   = "do not dump the preamble of the doc in a format file."
+    )
+
+    parser.add_argument(
+        "--partial",
+        action = "store_true",
+        help   = "only typeset the sources changed since the last compilation."
+    )
+
+    parser.add_argument(
+        "--externalize",
+        action = "store_true",
+        help   = "include the algocharts as images compiled apart."
+    )
+
+    parser.add_argument(
+        "--hardlink",
+        action = "store_true",
+        help   = "use hard links instead of copies for the examples."
+    )
+
+    parser.add_argument(
+        "--lang",
+        action = "append",
+        dest   = "langs",
+        help   = "language of a doc to build, all of them by default."
+    )
+
+    ARGS = parser.parse_args()
+
+    build(
+        jobs        = ARGS.jobs,
+        maxpasses   = ARGS.maxpasses,
+        converge    = not ARGS.no_converge,
+        excache     = not ARGS.no_excache,
+        usefmt      = not ARGS.no_fmt,
+        hardlink    = ARGS.hardlink,
+        partial     = ARGS.partial,
+        externalize = ARGS.externalize,
+        langs       = ARGS.langs
+    )
@@ -1,8 +1,19 @@
 #! /usr/bin/env python3
 
-from mistool.latex_use import clean as latexclean
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+import os
+from pathlib import Path
+
+from mistool.latex_use import EXTS_TO_CLEAN
 from mistool.os_use import PPath
 
+from tools.examples import EXA_CACHE_DIR
+from tools.external import AC_DIR
+from tools.latex import FMT_DIR
+from tools.scan import Scan
+from tools.trace import traced
+
 
 # ----------------------- #
 # -- TOOLS & CONSTANTS -- #
@@ -11,19 +22,180 @@ from mistool.os_use import PPath
 FACTORY_DIR = PPath( __file__ ).parent
 LYXAM_DIR   = FACTORY_DIR.parent / "lyalgo"
 
+CACHE_DIRS = [EXA_CACHE_DIR, FMT_DIR, AC_DIR]
+
+BATCH_SIZE = 64
+
+DECO = " "*4
+
+
+def humansize(nbbytes):
+    if nbbytes < 1024:
+        return f"{nbbytes} B"
+
+    for unit in ["KB", "MB", "GB"]:
+        nbbytes /= 1024
+
+        if nbbytes < 1024 or unit == "GB":
+            return f"{nbbytes:.1f} {unit}"
+
+
+def filesize(onepath):
+    try:
+        return os.lstat(onepath).st_size
+
+    except FileNotFoundError:
+        return 0
+
+
+# -------------------- #
+# -- FILES TO CLEAN -- #
+# -------------------- #
+
+# Like "mistool.latex_use.clean", the extra files of LaTeX are the ones
+# having the same name as a TeX file. Everything is found in one pass on
+# the shared scan.
+@traced("trash search", cat = "fs")
+def find_trash(scan, factory_dir, lyxam_dir):
+    factory_files = scan.under(factory_dir)
+    names         = {str(onepath) for onepath in factory_files}
+    trash         = set()
+
+    for onepath in factory_files:
+        if onepath.name.endswith(".macros-x.txt") \
+        or onepath.suffix == ".pdf":
+            trash.add(onepath)
+
+        elif onepath.suffix == ".tex":
+            stem = str(onepath)[:-len(".tex")]
+
+            for ext in EXTS_TO_CLEAN:
+                if f"{stem}.{ext}" in names:
+                    trash.add(Path(f"{stem}.{ext}"))
+
+    for onepath in scan.under(lyxam_dir):
+        if onepath.parent == Path(lyxam_dir).resolve() \
+        and onepath.name.endswith(".macros-x.txt"):
+            trash.add(onepath)
+
+    return sorted(trash)
+
+
+# The cache is not in the scan because it changes at each run.
+@traced("cache search", cat = "fs")
+def find_cache():
+    trash = []
+
+    for cachedir in CACHE_DIRS:
+        for root, _, files in os.walk(cachedir):
+            trash += [Path(root) / name for name in files]
+
+    return sorted(trash)
+
+
+# -------------- #
+# -- REMOVING -- #
+# -------------- #
+
+def remove_batch(batch):
+    for onepath in batch:
+        try:
+            os.remove(onepath)
+
+        except FileNotFoundError:
+            pass
+
+
+@traced("cleaning", cat = "fs")
+def remove_all(trash, jobs = 1):
+    batches = [
+        trash[i:i + BATCH_SIZE]
+        for i in range(0, len(trash), BATCH_SIZE)
+    ]
+
+    with ThreadPoolExecutor(max_workers = max(1, jobs)) as pool:
+        list(pool.map(remove_batch, batches))
+
+# Empty folders of the cache.
+    for cachedir in CACHE_DIRS:
+        for root, _, _ in os.walk(cachedir, topdown = False):
+            if not os.listdir(root):
+                os.rmdir(root)
+
 
 # ----------------------- #
 # -- CLEAN BEFORE PUSH -- #
 # ----------------------- #
 
-for toremove in FACTORY_DIR.walk("file::**.macros-x.txt"):
-    toremove.remove()
+def build(
+    dryrun      = False,
+    keepcache   = True,
+    jobs        = 1,
+    factory_dir = FACTORY_DIR,
+    lyxam_dir   = LYXAM_DIR
+):
+    scan = Scan.load()
+
+    trash = find_trash(scan, factory_dir, lyxam_dir)
+
+    if not keepcache:
+        trash += find_cache()
+
+    nbbytes = sum(filesize(onepath) for onepath in trash)
+
+    if dryrun:
+        for onepath in trash:
+            print(
+                f"{DECO}* << {PPath(onepath) - factory_dir.parent} >> "
+                f"{humansize(filesize(onepath))}"
+            )
+
+        print(
+            f"{DECO}* {len(trash)} file(s) would be removed : "
+            f"{humansize(nbbytes)} freed."
+        )
+
+        return []
+
+    remove_all(trash, jobs)
+
+    scan.refresh()
+    scan.save()
+
+    print(
+        f"{DECO}* {len(trash)} file(s) removed : "
+        f"{humansize(nbbytes)} freed."
+    )
+
+    return [PPath(onepath) for onepath in trash]
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+
+    parser.add_argument(
+        "--dry-run",
+        action = "store_true",
+        help   = "only list the files to remove and the bytes freed."
+    )
+
+    parser.add_argument(
+        "--drop-cache",
+        action = "store_true",
+        help   = "also remove the examples typeset and the formats dumped."
+    )
 
-for toremove in LYXAM_DIR.walk("file::*.macros-x.txt"):
-    toremove.remove()
+    parser.add_argument(
+        "--jobs", "-j",
+        type    = int,
+        default = 1,
+        help    = "number of batches of files removed at the same time."
+    )
 
-for toremove in FACTORY_DIR.walk("file::**.pdf"):
-    toremove.remove()
+    ARGS = parser.parse_args()
 
-for toremove in FACTORY_DIR.walk("dir::*"):
-    latexclean(toremove)
+    build(
+        dryrun    = ARGS.dry_run,
+        keepcache = not ARGS.drop_cache,
+        jobs      = ARGS.jobs
+    )
@@ -6,11 +6,19 @@ from mistool.latex_use import install, PPath
 
 DECO = " "*4
 
-answer = input(f"{DECO}* Local installation ? [y/n] ")
+THIS_DIR = PPath( __file__ ).parent
 
-if answer.lower() == "y":
-    THIS_DIR = PPath( __file__ ).parent
 
-    install(ppath = THIS_DIR.parent / "lyalgo")
+def build(lyalgo_dir = THIS_DIR.parent / "lyalgo"):
+    answer = input(f"{DECO}* Local installation ? [y/n] ")
 
-    print(f"{DECO}* Installation has been done.")
+    if answer.lower() == "y":
+        install(ppath = lyalgo_dir)
+
+        print(f"{DECO}* Installation has been done.")
+
+    return []
+
+
+if __name__ == "__main__":
+    build()
@@ -1,12 +1,25 @@
-# gestion de [en] et [fr]
-
 #!/usr/bin/env python3
 
 # --------------------- #
 # -- SEVERAL IMPORTS -- #
 # --------------------- #
 
-from mistool.os_use import PPath, runthis
+from argparse import ArgumentParser
+import sys
+
+from mistool.os_use import PPath
+
+from tools.graph import langtag, launch, Step
+from tools.manifest import Manifest
+from tools.trace import (
+    exporttrace,
+    flush,
+    span,
+    starttrace,
+    summary,
+    summarytable
+)
+from tools.watch import substeps, watch
 
 
 # --------------- #
@@ -16,31 +29,197 @@ from mistool.os_use import PPath, runthis
 THIS_FILE = PPath(__file__)
 THIS_DIR  = THIS_FILE.parent
 
+DECO = " "*4
+
+FR = langtag("fr")
+
+# The docs of all the languages are built by the same step.
+ANYLANG = langtag("*")
+
+
+# ---------------------- #
+# -- THE COMMAND LINE -- #
+# ---------------------- #
+
+parser = ArgumentParser(
+    description = "Build the package lyalgo and its documentation."
+)
+
+parser.add_argument(
+    "--force",
+    action = "store_true",
+    help   = "launch every builder even if its inputs have not changed."
+)
+
+parser.add_argument(
+    "--jobs", "-j",
+    type    = int,
+    default = 1,
+    help    = "number of builders and compilations launched at the same time."
+)
+
+parser.add_argument(
+    "--maxpasses",
+    type    = int,
+    default = 3,
+    help    = "maximum number of pdflatex passes for one document."
+)
+
+parser.add_argument(
+    "--externalize",
+    action = "store_true",
+    help   = "include the algocharts of the docs as images compiled apart."
+)
+
+parser.add_argument(
+    "--watch",
+    action = "store_true",
+    help   = "after the building, relaunch the steps concerned by each change."
+)
+
+parser.add_argument(
+    "--subprocess",
+    action = "store_true",
+    help   = "launch each builder in its own Python process."
+)
+
+parser.add_argument(
+    "--trace",
+    help = "JSON file receiving the timing spans in the format of Chrome."
+)
+
+
+# ---------------------------- #
+# -- WHAT EACH BUILDER DOES -- #
+# ---------------------------- #
+
+def buildsteps(jobs, maxpasses, externalize = False):
+    return [
+        Step(
+            name    = "keywords",
+            script  = "03-algo-basic/build-04-keywords.py",
+            inputs  = [
+                "factory/03-algo-basic/keywords/config/**/*.peuf",
+                f"factory/03-algo-basic/04-keywords{FR}.tex",
+            ],
+            outputs = [
+                "factory/03-algo-basic/04-keywords.sty",
+                "factory/03-algo-basic/keywords/*.sty",
+                f"factory/03-algo-basic/04-keywords{FR}.tex",
+                "factory/03-algo-basic/examples/algo-basic/additional-macros/*.tex",
+                "lyalgo/keywords/*.sty",
+            ]
+        ),
+        Step(
+            name    = "sty",
+            script  = "build-01-sty.py",
+            inputs  = [
+                "factory/**/[0-9]*.sty",
+            ],
+            outputs = [
+                "lyalgo/lyalgo*.sty",
+            ],
+            after   = ["keywords"]
+        ),
+        Step(
+            name         = "doc",
+            script       = "build-02-doc.py",
+            inputs       = [
+                f"factory/config/doc{ANYLANG}.tex",
+                f"factory/config/header{ANYLANG}.sty",
+                f"factory/**/*{ANYLANG}.tex",
+                "factory/**/examples/**/*",
+                "lyalgo/lyalgo*.sty",
+                "lyalgo/keywords/*.sty",
+            ],
+            outputs      = [
+                f"lyalgo/lyalgo-doc{ANYLANG}.tex",
+                f"lyalgo/lyalgo-doc{ANYLANG}.pdf",
+                "lyalgo/examples/**/*",
+                "lyalgo/chapters/**/*.tex",
+            ],
+            after        = ["keywords", "sty"],
+            options      = {
+                "jobs"       : jobs,
+                "maxpasses"  : maxpasses,
+                "externalize": externalize,
+            },
+# When watching, only the units using the changed sources or examples are
+# typeset : see the module "tools.include".
+            watchoptions = {
+                "partial": True,
+            }
+        ),
+        Step(
+            name   = "clean",
+            script = "build-03-clean-extra.py",
+            after  = ["doc"]
+        ),
+        Step(
+            name        = "install",
+            script      = "build-04-local-install.py",
+            after       = ["clean"],
+            interactive = True
+        ),
+    ]
+
+
+# ------------------ #
+# -- TIMING SPANS -- #
+# ------------------ #
+
+# The spans of the builders are written by their processes.
+def showtrace(tracepath):
+    flush()
+
+    events = exporttrace(tracepath)
+
+    print(f"+ Timing spans exported in << {tracepath.name} >>.")
+
+    for line in summarytable(summary(events)):
+        print(f"{DECO}{line}")
+
 
 # -------------------------------------- #
 # -- LAUNCHING ALL THE BUILDING TOOLS -- #
 # -------------------------------------- #
 
-for pattern in [
-    "file::**build-*.py",
-    "file::build-*.py"
-]:
-    allpaths = [onepath for onepath in THIS_DIR.walk(pattern)]
-    allpaths.sort()
+if __name__ == "__main__":
+    ARGS = parser.parse_args()
 
-    for onepath in allpaths:
-        filename = (onepath - THIS_DIR).stem
+    STEPS    = buildsteps(ARGS.jobs, ARGS.maxpasses, ARGS.externalize)
+    MANIFEST = Manifest()
 
-        if filename[7].isdigit():
-            comment = ""
+# The tracing must start before the processes of the builders.
+    if ARGS.trace:
+        starttrace(name = "launch")
 
-        else:
-            comment = "  [this is a sub builder]"
+# The interactive steps are useless when watching.
+    if ARGS.watch:
+        STEPS = substeps(
+            STEPS,
+            [step.name for step in STEPS if not step.interactive]
+        )
 
-        print(f'+ Launching "{filename}"{comment}')
+    with span("launch", cat = "build"):
+        success = launch(
+            steps     = STEPS,
+            manifest  = MANIFEST,
+            jobs      = max(1, ARGS.jobs),
+            force     = ARGS.force,
+            inprocess = not ARGS.subprocess
+        )
 
+    if ARGS.trace:
+        showtrace(PPath(ARGS.trace))
 
-        runthis(
-            cmd        = 'python "{0}"'.format(onepath),
-            showoutput = True
+    if ARGS.watch:
+        watch(
+            steps     = STEPS,
+            manifest  = MANIFEST,
+            jobs      = max(1, ARGS.jobs),
+            inprocess = not ARGS.subprocess
         )
+
+    elif not success:
+        sys.exit("+ The building has been stopped.")
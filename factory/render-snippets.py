@@ -0,0 +1,217 @@
+#! /usr/bin/env python3
+
+# Rendering of snippets of lyalgo to PDF or SVG files : see the module
+# ``tools.render``. Use ``launch.py`` before to build ``lyalgo.sty``.
+#
+# The snippets are either files, named like them, or JSON lines read from
+# the standard input.
+#
+#     {"name": "syracuse", "source": "\\begin{algo} ... \\end{algo}"}
+
+from argparse import ArgumentParser
+import json
+import sys
+import time
+
+from mistool.os_use import PPath
+
+from tools.render import FORMATS, RenderPool, TIMEOUT
+from tools.rendercache import MAX_BYTES, RenderCache
+from tools.smoke import headerpreamble, MINIMAL_PREAMBLE
+
+
+# ----------------------- #
+# -- TOOLS & CONSTANTS -- #
+# ----------------------- #
+
+DECO = " "*4
+
+
+def filesnippets(paths):
+    for onepath in paths:
+        onepath = PPath(onepath)
+
+        with open(onepath, encoding = "utf-8") as snipfile:
+            yield onepath.stem, snipfile.read()
+
+
+def stdinsnippets():
+    for nbline, line in enumerate(sys.stdin, 1):
+        line = line.strip()
+
+        if not line:
+            continue
+
+        snippet = json.loads(line)
+
+        yield snippet.get("name", f"snippet-{nbline}"), snippet["source"]
+
+
+def showresult(result):
+    status = "OK" if result["success"] else "FAILED"
+
+    if result["cached"]:
+        status += ", CACHE"
+
+    print(
+        f"{DECO}* [{status}] {result['name']} "
+        f"({result['time']:.2f} s)"
+    )
+
+    if result["error"]:
+        print(f"{DECO}  {result['error']}")
+
+
+# --------------- #
+# -- THE BATCH -- #
+# --------------- #
+
+def render(
+    snippets,
+    output_dir,
+    ext     = "pdf",
+    jobs    = None,
+    width   = None,
+    timeout = TIMEOUT,
+    lang    = None,
+    usefmt  = True,
+    cache   = None
+):
+    options = {
+        "preamble": MINIMAL_PREAMBLE if lang is None else headerpreamble(lang),
+        "jobs"    : jobs,
+        "timeout" : timeout,
+        "usefmt"  : usefmt,
+        "cache"   : cache,
+    }
+
+    if width:
+        options["width"] = width
+
+    results = []
+    start   = time.time()
+
+    with RenderPool(**options) as pool:
+        for result in pool.render(snippets, output_dir, ext):
+            showresult(result)
+
+            results.append(result)
+
+    nbfailed = sum(not result["success"] for result in results)
+
+    print(
+        f"+ {len(results) - nbfailed} snippet(s) rendered, "
+        f"{nbfailed} failed in {time.time() - start:.2f} s."
+    )
+
+    if cache is not None:
+        stats = cache.stats()
+
+        print(
+            f"+ Cache : {stats['hits']} hit(s), {stats['misses']} miss(es), "
+            f"{stats['entries']} entries using "
+            f"{stats['bytes'] / 1024**2:.1f} MB "
+            f"out of {stats['maxbytes'] / 1024**2:.1f} MB."
+        )
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(
+        description = "Render snippets of lyalgo to PDF or SVG files."
+    )
+
+    parser.add_argument(
+        "files",
+        nargs = "*",
+        help  = "files of the snippets, JSON lines read from stdin if none."
+    )
+
+    parser.add_argument(
+        "--output", "-o",
+        default = ".",
+        help    = "folder of the files rendered."
+    )
+
+    parser.add_argument(
+        "--format",
+        choices = FORMATS,
+        default = "pdf",
+        help    = "format of the files rendered."
+    )
+
+    parser.add_argument(
+        "--jobs", "-j",
+        type = int,
+        help = "number of TeX workers, one by core by default."
+    )
+
+    parser.add_argument(
+        "--width",
+        help = "width of the snippets, \\linewidth by default."
+    )
+
+    parser.add_argument(
+        "--timeout",
+        type    = float,
+        default = TIMEOUT,
+        help    = "seconds given to the compilation of one snippet."
+    )
+
+    parser.add_argument(
+        "--lang",
+        help = "use the header of the doc of this language, English keywords by default."
+    )
+
+    parser.add_argument(
+        "--no-fmt",
+        action = "store_true",
+        help   = "do not dump the preamble in a format file."
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action = "store_true",
+        help   = "render all the snippets, without the render cache."
+    )
+
+    parser.add_argument(
+        "--cache-size",
+        type    = float,
+        default = MAX_BYTES / 1024**2,
+        help    = "size budget of the render cache in MB."
+    )
+
+    parser.add_argument(
+        "--report",
+        help = "JSON file receiving the results."
+    )
+
+    ARGS = parser.parse_args()
+
+    CACHE = None if ARGS.no_cache else RenderCache(
+        maxbytes = int(ARGS.cache_size * 1024**2)
+    )
+
+    results = render(
+        snippets   = filesnippets(ARGS.files) if ARGS.files else stdinsnippets(),
+        output_dir = PPath(ARGS.output).resolve(),
+        ext        = ARGS.format,
+        jobs       = ARGS.jobs,
+        width      = ARGS.width,
+        timeout    = ARGS.timeout,
+        lang       = ARGS.lang,
+        usefmt     = not ARGS.no_fmt,
+        cache      = CACHE
+    )
+
+    if CACHE is not None:
+        CACHE.close()
+
+    if ARGS.report:
+        with open(ARGS.report, mode = "w", encoding = "utf-8") as jsonfile:
+            json.dump(results, jsonfile, indent = 1, default = str)
+
+    if not all(result["success"] for result in results):
+        sys.exit("+ Some snippets are broken.")
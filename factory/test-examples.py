@@ -0,0 +1,127 @@
+#! /usr/bin/env python3
+
+# Smoke tests of the examples copied in ``lyalgo/examples`` : see the
+# module ``tools.smoke``. Use ``launch.py`` before to copy the last versions
+# of the examples.
+#
+# By default, the preamble is the header of the French doc, like the one
+# used to typeset the examples in the doc.
+
+from argparse import ArgumentParser
+import sys
+import time
+
+from tools.smoke import (
+    DOC_LANG,
+    findexamples,
+    headerpreamble,
+    MINIMAL_PREAMBLE,
+    smokeall,
+    TIMEOUT
+)
+
+
+# ----------------------- #
+# -- TOOLS & CONSTANTS -- #
+# ----------------------- #
+
+DECO = " "*4
+
+
+def showresult(result):
+    status = "OK" if result["success"] else "FAILED"
+
+    print(
+        f"{DECO}* [{status}] {result['example']} "
+        f"({result['time']:.2f} s)"
+    )
+
+    if result["error"]:
+        print(f"{DECO}  {result['error']}")
+
+
+# ------------------- #
+# -- ALL THE TESTS -- #
+# ------------------- #
+
+def test(
+    patterns = None,
+    jobs     = 1,
+    timeout  = TIMEOUT,
+    lang     = DOC_LANG
+):
+    examples = findexamples(patterns)
+    preamble = MINIMAL_PREAMBLE if lang is None else headerpreamble(lang)
+
+    print(f"+ Smoke tests of {len(examples)} example(s).")
+
+    start   = time.time()
+    results = smokeall(
+        examples = examples,
+        preamble = preamble,
+        jobs     = jobs,
+        timeout  = timeout,
+        onresult = showresult
+    )
+
+    failed = [result for result in results if not result["success"]]
+
+    print(
+        f"+ {len(results) - len(failed)} example(s) passed, "
+        f"{len(failed)} failed in {time.time() - start:.2f} s."
+    )
+
+    for result in failed:
+        print(f"{DECO}* {result['example']} : {result['error']}")
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(
+        description = "Compile each example alone in a minimal document."
+    )
+
+    parser.add_argument(
+        "patterns",
+        nargs = "*",
+        help  = "globs like \"examples/flowchart/**\", all the examples by default."
+    )
+
+    parser.add_argument(
+        "--jobs", "-j",
+        type    = int,
+        default = 1,
+        help    = "number of examples compiled at the same time."
+    )
+
+    parser.add_argument(
+        "--timeout",
+        type    = float,
+        default = TIMEOUT,
+        help    = "seconds given to the compilation of one example."
+    )
+
+    parser.add_argument(
+        "--lang",
+        default = DOC_LANG,
+        help    = "use the header of the doc of this language as the preamble."
+    )
+
+    parser.add_argument(
+        "--minimal",
+        action = "store_true",
+        help   = "only load lyalgo with the English keywords as the preamble."
+    )
+
+    ARGS = parser.parse_args()
+
+    results = test(
+        patterns = ARGS.patterns,
+        jobs     = ARGS.jobs,
+        timeout  = ARGS.timeout,
+        lang     = None if ARGS.minimal else ARGS.lang
+    )
+
+    if not all(result["success"] for result in results):
+        sys.exit("+ Some examples are broken.")
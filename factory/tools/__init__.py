@@ -0,0 +1,20 @@
+#! /usr/bin/env python3
+
+# Shared tools used by ``launch.py`` and the builders of the factory.
+#
+# Nothing here depends on ``mistool`` or ``orpyste`` : the paths are standard
+# ``pathlib.Path`` objects, so they can be mixed with ``PPath`` ones.
+
+from pathlib import Path
+
+
+# --------------- #
+# -- CONSTANTS -- #
+# --------------- #
+
+FACTORY_DIR = Path(__file__).resolve().parent.parent
+PROJECT_DIR = FACTORY_DIR.parent
+LYALGO_DIR  = PROJECT_DIR / "lyalgo"
+
+# The "x-" prefix makes the builders ignore this folder.
+CACHE_DIR = FACTORY_DIR / "x-cache"
@@ -0,0 +1,408 @@
+#! /usr/bin/env python3
+
+# Benchmarks of the factory and of ``lyalgo.sty``.
+#
+# Each builder is launched in its own Python process, first cold, with the
+# caches of the factory removed, and then warm, several times just after.
+# The time of a warm run is the best one. The caches found before the
+# benchmark are moved aside, and put back at the end, even if it is
+# stopped : the next build of the developer is not a full one.
+#
+# ``pdflatex`` is also timed on small reference documents using
+# ``lyalgo.sty`` with the English keywords and without format, so the time
+# needed to load the package is seen, and on one pass of each doc. Each
+# document is compiled once before being timed : a broken one fails
+# instead of giving the time of an error. The doc is compiled in
+# ``x-cache/bench`` without the caches of the factory, so its examples and
+# all its sources are typeset.
+#
+# The metrics are kept in ``x-cache/bench/history.json``. A metric regresses
+# when it is slower than the median of its last values by more than a ratio
+# and by more than a minimal delay : the small differences are only noise.
+
+from contextlib import contextmanager
+import json
+import os
+from pathlib import Path
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from tools import CACHE_DIR, FACTORY_DIR, LYALGO_DIR
+from tools.examples import EXA_CACHE_DIR
+from tools.external import AC_DIR
+from tools.include import DOC_CACHE_DIR
+from tools.latex import FMT_DIR, PDFLATEX, PDFLATEX_OPTIONS
+from tools.manifest import MANIFEST_PATH
+from tools.scan import SCAN_PATH
+from tools.smoke import MINIMAL_PREAMBLE
+from tools.sync import SYNC_MANIFEST_PATH
+
+
+# --------------- #
+# -- CONSTANTS -- #
+# --------------- #
+
+BENCH_DIR    = CACHE_DIR / "bench"
+HISTORY_PATH = BENCH_DIR / "history.json"
+
+HISTORY_SIZE  = 200
+BASELINE_SIZE = 5
+
+REPEAT    = 3
+TIMEOUT   = 600
+THRESHOLD = 0.25
+MIN_DELTA = 0.1
+
+# The builder of the install is interactive, so it is not timed.
+BUILDERS = [
+    ("build-04-keywords", "03-algo-basic/build-04-keywords.py"),
+    ("build-01-sty"     , "build-01-sty.py"),
+    ("build-02-doc"     , "build-02-doc.py"),
+]
+
+# What a cold run must rebuild. The cache of "build-04-keywords" is named
+# in its script.
+COLD_PATHS = [
+    EXA_CACHE_DIR,
+    FMT_DIR,
+    AC_DIR,
+    DOC_CACHE_DIR,
+    MANIFEST_PATH,
+    SCAN_PATH,
+    SYNC_MANIFEST_PATH,
+    CACHE_DIR / "keywords-peuf.json",
+]
+
+REFERENCE_TEMPLATE = r"""
+\documentclass{{article}}
+
+{preamble}
+
+\begin{{document}}
+
+{body}
+
+\end{{document}}
+""".lstrip()
+
+REFERENCES = {
+    "empty": "",
+    "algo": r"""
+\begin{algo}
+    \Data{$n$}
+    \Result{$s$}
+
+    \Actions{
+        $s \leftarrow 0$
+        \\
+        \ForRange{$i$}{$1$}{$n$}{
+            $s \leftarrow s + i$
+        }
+        \Return{$s$}
+    }
+\end{algo}
+""".strip(),
+    "algochart": r"""
+\begin{algochart}
+    \node[acio] (input) {$n$};
+
+    \node[acif, below of = input] (is-neg) {$n < 0$ ?};
+
+    \node[acinstr, below of = is-neg] (output) {$|n|$};
+
+    \path[aclink] (input) -- (is-neg);
+    \path[aclink] (is-neg) -- (output);
+\end{algochart}
+""".strip(),
+}
+
+
+# ----------- #
+# -- TOOLS -- #
+# ----------- #
+
+def clearcold(paths = COLD_PATHS):
+    for onepath in paths:
+        if onepath.is_dir():
+            shutil.rmtree(onepath, ignore_errors = True)
+
+        elif onepath.is_file():
+            onepath.unlink()
+
+
+# The caches are moved, not copied, so nothing is seen by the cold runs.
+@contextmanager
+def keepcold(paths = COLD_PATHS, bench_dir = BENCH_DIR):
+    bench_dir.mkdir(parents = True, exist_ok = True)
+
+    saved_dir = Path(tempfile.mkdtemp(prefix = "saved-", dir = bench_dir))
+    saved     = []
+
+    for i, onepath in enumerate(paths):
+        if onepath.exists():
+            savedpath = saved_dir / f"{i}-{onepath.name}"
+
+            os.replace(onepath, savedpath)
+            saved.append((savedpath, onepath))
+
+    try:
+        yield
+
+    finally:
+        clearcold(paths)
+
+        for savedpath, onepath in saved:
+            onepath.parent.mkdir(parents = True, exist_ok = True)
+            os.replace(savedpath, onepath)
+
+        shutil.rmtree(saved_dir, ignore_errors = True)
+
+
+def timerun(command, cwd, timeout = TIMEOUT):
+    start = time.time()
+
+    try:
+        process = subprocess.run(
+            command,
+            cwd     = cwd,
+            stdin   = subprocess.DEVNULL,
+            stdout  = subprocess.DEVNULL,
+            stderr  = subprocess.DEVNULL,
+            timeout = timeout
+        )
+
+    except subprocess.TimeoutExpired:
+        return None
+
+    if process.returncode:
+        return None
+
+    return time.time() - start
+
+
+# The best time of several runs, or None if one run fails.
+def besttime(command, cwd, repeat = REPEAT, timeout = TIMEOUT):
+    times = []
+
+    for _ in range(max(1, repeat)):
+        onetime = timerun(command, cwd, timeout)
+
+        if onetime is None:
+            return None
+
+        times.append(onetime)
+
+    return min(times)
+
+
+def langdocs(lyalgo_dir = LYALGO_DIR):
+    return sorted(lyalgo_dir.glob("lyalgo-doc[[]*].tex"))
+
+
+# -------------- #
+# -- BUILDERS -- #
+# -------------- #
+
+def benchbuilders(
+    repeat      = REPEAT,
+    timeout     = TIMEOUT,
+    options     = None,
+    onmetric    = None,
+    factory_dir = FACTORY_DIR
+):
+    options = options or {}
+    metrics = {}
+    failed  = []
+
+    with keepcold():
+        for name, script in BUILDERS:
+            command = [sys.executable, str(factory_dir / script)]
+
+            for key, value in options.get(name, {}).items():
+                command += [f"--{key}", str(value)]
+
+            clearcold()
+
+            for kind, nbruns in [("cold", 1), ("warm", repeat)]:
+                metric  = f"{name}/{kind}"
+                onetime = besttime(command, factory_dir, nbruns, timeout)
+
+                if onetime is None:
+                    failed.append(metric)
+
+                else:
+                    metrics[metric] = onetime
+
+                if onmetric is not None:
+                    onmetric(metric, onetime)
+
+    return metrics, failed
+
+
+# -------------- #
+# -- PDFLATEX -- #
+# -------------- #
+
+def pdflatexcommand(texpath, workdir):
+    return [PDFLATEX] + PDFLATEX_OPTIONS + [
+        "-halt-on-error",
+        f"-output-directory={workdir}",
+        str(texpath)
+    ]
+
+
+# The working directory is the one of lyalgo.sty because this file uses
+# relative paths for the keywords.
+def benchpdflatex(
+    repeat     = REPEAT,
+    timeout    = TIMEOUT,
+    withdocs   = True,
+    onmetric   = None,
+    lyalgo_dir = LYALGO_DIR,
+    bench_dir  = BENCH_DIR
+):
+    metrics = {}
+    failed  = []
+    jobs    = []
+
+    workdir = bench_dir / "work"
+
+    shutil.rmtree(workdir, ignore_errors = True)
+    workdir.mkdir(parents = True)
+
+    for name, body in REFERENCES.items():
+        texpath = workdir / f"bench-{name}.tex"
+
+        with open(texpath, mode = "w", encoding = "utf-8") as texfile:
+            texfile.write(
+                REFERENCE_TEMPLATE.format(
+                    preamble = MINIMAL_PREAMBLE,
+                    body     = body
+                )
+            )
+
+        jobs.append((f"pdflatex/{name}", texpath, workdir))
+
+# The auxiliary files of the "\include" are written in sub folders of the
+# output folder which must exist.
+    if withdocs:
+        for docpath in langdocs(lyalgo_dir):
+            docdir = workdir / docpath.stem
+
+            for unitdir in (lyalgo_dir / "chapters").glob("*"):
+                if unitdir.is_dir():
+                    (docdir / "chapters" / unitdir.name).mkdir(
+                        parents  = True,
+                        exist_ok = True
+                    )
+
+            jobs.append((f"pdflatex/{docpath.stem}", docpath, docdir))
+
+    for metric, texpath, outdir in jobs:
+        command = pdflatexcommand(texpath, outdir)
+        onetime = None
+
+        if timerun(command, lyalgo_dir, timeout) is not None:
+            onetime = besttime(command, lyalgo_dir, repeat, timeout)
+
+        if onetime is None:
+            failed.append(metric)
+
+        else:
+            metrics[metric] = onetime
+
+        if onmetric is not None:
+            onmetric(metric, onetime)
+
+    shutil.rmtree(workdir, ignore_errors = True)
+
+    return metrics, failed
+
+
+# ------------- #
+# -- HISTORY -- #
+# ------------- #
+
+def readhistory(path = HISTORY_PATH):
+    try:
+        with open(path, encoding = "utf-8") as jsonfile:
+            return json.load(jsonfile)["runs"]
+
+# A broken history only means a new one.
+    except (ValueError, OSError, KeyError):
+        return []
+
+
+def savehistory(metrics, failed, path = HISTORY_PATH):
+    history = readhistory(path)
+
+    history.append({
+        "time"   : int(time.time()),
+        "metrics": metrics,
+        "failed" : failed,
+    })
+
+    path.parent.mkdir(parents = True, exist_ok = True)
+
+    tmppath = path.with_suffix(".tmp")
+
+    with open(tmppath, mode = "w", encoding = "utf-8") as jsonfile:
+        json.dump(
+            {"runs": history[-HISTORY_SIZE:]},
+            jsonfile,
+            indent    = 1,
+            sort_keys = True
+        )
+
+    os.replace(tmppath, path)
+
+    return path
+
+
+def baselines(history, size = BASELINE_SIZE):
+    values = {}
+
+    for run in history:
+        for metric, value in run["metrics"].items():
+            values.setdefault(metric, []).append(value)
+
+    return {
+        metric: statistics.median(metricvalues[-size:])
+        for metric, metricvalues in values.items()
+    }
+
+
+# A new metric has no baseline, so it never regresses.
+def compare(
+    metrics,
+    history,
+    threshold = THRESHOLD,
+    mindelta  = MIN_DELTA,
+    size      = BASELINE_SIZE
+):
+    bases   = baselines(history, size)
+    results = []
+
+    for metric, value in sorted(metrics.items()):
+        base = bases.get(metric)
+
+        result = {
+            "metric"   : metric,
+            "value"    : value,
+            "baseline" : base,
+            "change"   : None,
+            "regressed": False,
+        }
+
+        if base:
+            result["change"]    = value / base - 1
+            result["regressed"] = result["change"] > threshold \
+                              and value - base > mindelta
+
+        results.append(result)
+
+    return results
@@ -0,0 +1,248 @@
+#! /usr/bin/env python3
+
+# Render cache for the examples shown by ``\codeasideoutput``.
+#
+# Each example is typeset once in a small document using the same preamble
+# as the doc, and then cropped with the package ``preview``. The PDF is stored
+# in ``x-cache/examples`` with a name given by the hash of the example, the
+# preamble and the style files. The format dumped for the doc can be used
+# because the preamble is the same.
+#
+# A map file ``<jobname>-exacache.tex`` tells the doc which examples can be
+# included as images. The doc finds it through ``TEXINPUTS`` : without it,
+# for example outside the factory, the examples are simply typeset again.
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import re
+import subprocess
+import threading
+
+from tools import CACHE_DIR, LYALGO_DIR
+from tools.latex import (
+    fmtoptions,
+    PDFLATEX,
+    PDFLATEX_OPTIONS,
+    stylehash,
+    texenv
+)
+from tools.manifest import filehash
+from tools.output import writetext
+from tools.trace import span
+
+
+# --------------- #
+# -- CONSTANTS -- #
+# --------------- #
+
+EXA_CACHE_DIR = CACHE_DIR / "examples"
+
+PATTERN_CODEASIDE = re.compile(r"\\codeasideoutput\{(.*?)\}")
+
+# Numbered captions and labels depend on the place of the example in the doc.
+PATTERN_NOCACHE = re.compile(r"\\(caption|algovoidcaption|label)\b")
+
+# Change this version if the wrapper below changes.
+WRAPPER_VERSION = "2"
+
+# Without format, "\endofdump" must be defined by hand. This is done without
+# writing its name which ends the part skipped when a format is used.
+WRAPPER_TEMPLATE = r"""
+{preamble}
+\expandafter\providecommand\csname endofdump\endcsname{{}}
+\endofdump
+
+\usepackage[active, tightpage]{{preview}}
+
+\begin{{document}}
+
+\begin{{preview}}
+\begin{{minipage}}{{\dimexpr(\textwidth - \columnsep)/2\relax}}
+    \centering
+    \small
+    \input{{{example}}}
+\end{{minipage}}
+\end{{preview}}
+
+\end{{document}}
+""".lstrip()
+
+
+# ----------- #
+# -- TOOLS -- #
+# ----------- #
+
+def findexamples(doccontent):
+    examples = []
+
+    for example in PATTERN_CODEASIDE.findall(doccontent):
+        if example not in examples:
+            examples.append(example)
+
+    return examples
+
+
+def cachable(example, lyalgo_dir = LYALGO_DIR):
+    with open(lyalgo_dir / example, encoding = "utf-8") as exafile:
+        return not PATTERN_NOCACHE.search(exafile.read())
+
+
+def examplekey(example, preamble, stykey, lyalgo_dir = LYALGO_DIR):
+    hasher = hashlib.sha256()
+
+    for text in [
+        WRAPPER_VERSION,
+        preamble,
+        stykey,
+        filehash(lyalgo_dir / example),
+    ]:
+        hasher.update(text.encode("utf-8"))
+        hasher.update(b"\0")
+
+    return hasher.hexdigest()[:32]
+
+
+def mappath(jobname, cache_dir = EXA_CACHE_DIR):
+    return cache_dir / f"{jobname}-exacache.tex"
+
+
+# --------------- #
+# -- RENDERING -- #
+# --------------- #
+
+# The docs of several languages can ask for the same example at the same
+# time : it is typeset only once.
+RENDER_LOCKS = defaultdict(threading.Lock)
+LOCKS_GUARD  = threading.Lock()
+
+
+def renderlock(key):
+    with LOCKS_GUARD:
+        return RENDER_LOCKS[key]
+
+
+def renderone(
+    example,
+    key,
+    preamble,
+    fmt        = None,
+    lyalgo_dir = LYALGO_DIR,
+    cache_dir  = EXA_CACHE_DIR
+):
+    with renderlock(key):
+        return renderlocked(
+            example, key, preamble, fmt, lyalgo_dir, cache_dir
+        )
+
+
+def renderlocked(
+    example,
+    key,
+    preamble,
+    fmt        = None,
+    lyalgo_dir = LYALGO_DIR,
+    cache_dir  = EXA_CACHE_DIR
+):
+    pdfpath = cache_dir / f"{key}.pdf"
+
+    if pdfpath.is_file():
+        return True
+
+    wrapperpath = cache_dir / f"{key}.tex"
+
+    with open(wrapperpath, mode = "w", encoding = "utf-8") as wrapperfile:
+        wrapperfile.write(
+            WRAPPER_TEMPLATE.format(
+                preamble = preamble,
+                example  = example
+            )
+        )
+
+# The working directory is the one of lyalgo.sty because this file uses
+# relative paths for the keywords.
+    with span("pdflatex example", cat = "tex", example = example):
+        process = subprocess.run(
+            [PDFLATEX] + PDFLATEX_OPTIONS + fmtoptions(fmt) + [
+                f"-output-directory={cache_dir}",
+                str(wrapperpath)
+            ],
+            cwd    = lyalgo_dir,
+            env    = texenv(fmt = fmt),
+            stdout = subprocess.DEVNULL,
+            stderr = subprocess.DEVNULL
+        )
+
+    if process.returncode:
+        if pdfpath.is_file():
+            pdfpath.unlink()
+
+        return False
+
+    for ext in [".tex", ".aux", ".log", ".fls"]:
+        extrapath = cache_dir / f"{key}{ext}"
+
+        if extrapath.is_file():
+            extrapath.unlink()
+
+    return True
+
+
+def renderall(
+    doccontent,
+    preamble,
+    jobname,
+    fmt        = None,
+    jobs       = 1,
+    lyalgo_dir = LYALGO_DIR,
+    cache_dir  = EXA_CACHE_DIR
+):
+    cache_dir.mkdir(parents = True, exist_ok = True)
+
+    stykey = stylehash(lyalgo_dir)
+
+    keys = {
+        example: examplekey(example, preamble, stykey, lyalgo_dir)
+        for example in findexamples(doccontent)
+        if (lyalgo_dir / example).is_file()
+        and cachable(example, lyalgo_dir)
+    }
+
+    nbhits = sum(
+        (cache_dir / f"{key}.pdf").is_file()
+        for key in keys.values()
+    )
+
+    with ThreadPoolExecutor(max_workers = max(1, jobs)) as pool:
+        results = list(
+            pool.map(
+                lambda example: renderone(
+                    example    = example,
+                    key        = keys[example],
+                    preamble   = preamble,
+                    fmt        = fmt,
+                    lyalgo_dir = lyalgo_dir,
+                    cache_dir  = cache_dir
+                ),
+                keys
+            )
+        )
+
+    lines = [
+        "% File generated by the factory : examples already typeset.",
+    ]
+
+    for (example, key), success in zip(keys.items(), results):
+        if success:
+            lines.append(
+                f"\\expandafter\\def\\csname exacache@{example}\\endcsname"
+                f"{{{key}.pdf}}"
+            )
+
+    writetext(mappath(jobname, cache_dir), "\n".join(lines) + "\n")
+
+    return {
+        "hits"    : nbhits,
+        "rendered": sum(results) - nbhits,
+        "failed"  : len(results) - sum(results),
+    }
@@ -0,0 +1,249 @@
+#! /usr/bin/env python3
+
+# Externalization of the environments ``algochart``.
+#
+# With ``\algochartexternalize[<folder>]``, ``lyalgo.sty`` names each
+# ``algochart`` from the MD5 of its source. If ``<folder>ac-<md5>.pdf``
+# exists, it is included as an image. Otherwise the figure is drawn by TikZ,
+# and its source is written in ``<folder>ac-<md5>.tkz``.
+#
+# Instead of ``-shell-escape`` compiling the figures one after the other
+# during a pass, the factory compiles the pending figures between two passes
+# of the doc, several ``pdflatex`` at the same time. A figure is typeset
+# alone with the preamble of the doc and cropped with ``preview``, so the
+# format dumped for the doc can be used.
+#
+# The source written by ``lyalgo.sty`` chooses the font used where the
+# figure is, so a chart drawn under ``\small`` keeps this size when it is
+# compiled alone, and its name differs from the one of the same chart drawn
+# at another size.
+#
+# The folder of the figures is named from the preamble and the style files :
+# a new version of lyalgo never uses old figures. Like the formats, the
+# folders have a family, for example the language of a doc, so the docs
+# built at the same time do not remove the figures of each other.
+#
+# The doc reads the file ``<jobname>-algocharts.tex`` at the end of its
+# preamble if it exists.
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import os
+import shutil
+import subprocess
+import threading
+
+from tools import CACHE_DIR, LYALGO_DIR
+from tools.include import DOC_CACHE_DIR, globalkey
+from tools.latex import (
+    DUMP_END,
+    fmtoptions,
+    PDFLATEX,
+    PDFLATEX_OPTIONS,
+    texenv
+)
+from tools.output import writetext
+from tools.trace import span
+
+
+# --------------- #
+# -- CONSTANTS -- #
+# --------------- #
+
+AC_DIR = CACHE_DIR / "algocharts"
+
+AC_PREFIX = "ac-"
+
+WRAPPER_TEMPLATE = r"""
+{preamble}
+{dumpend}
+
+\usepackage[active, tightpage]{{preview}}
+\PreviewEnvironment{{tikzpicture}}
+\setlength\PreviewBorder{{0pt}}
+
+\begin{{document}}
+
+\input{{{figure}}}
+
+\end{{document}}
+""".lstrip()
+
+
+# ----------- #
+# -- TOOLS -- #
+# ----------- #
+
+def figureprefix(family = ""):
+    if family:
+        return f"{family}-"
+
+    return ""
+
+
+def figuredir(
+    preamble,
+    family     = "",
+    lyalgo_dir = LYALGO_DIR,
+    ac_dir     = AC_DIR
+):
+    return ac_dir / (
+        figureprefix(family) + globalkey(preamble, lyalgo_dir)[:16]
+    )
+
+
+def configpath(jobname, cache_dir = DOC_CACHE_DIR):
+    return cache_dir / f"{jobname}-algocharts.tex"
+
+
+# Without folder, the doc draws its algocharts at each pass.
+def writeconfig(jobname, figdir, family = "", cache_dir = DOC_CACHE_DIR):
+    path = configpath(jobname, cache_dir)
+
+    if figdir is None:
+        if path.is_file():
+            path.unlink()
+
+        return
+
+    figdir.mkdir(parents = True, exist_ok = True)
+
+# The figures of the same family made with old versions of the preamble or
+# of lyalgo are useless.
+    for olddir in figdir.parent.glob(figureprefix(family) + "?"*16):
+        if olddir != figdir:
+            shutil.rmtree(olddir, ignore_errors = True)
+
+    writetext(
+        path,
+        "% File generated by the factory : externalized algocharts.\n"
+        f"\\algochartexternalize[{figdir.as_posix()}/]\n"
+    )
+
+
+def pendingfigures(figdir):
+    return sorted(
+        tkzpath.stem
+        for tkzpath in figdir.glob(f"{AC_PREFIX}*.tkz")
+        if not tkzpath.with_suffix(".pdf").is_file()
+    )
+
+
+# ----------------- #
+# -- COMPILATION -- #
+# ----------------- #
+
+# Two builds of the same doc in one process must not compile the same
+# figure at the same time.
+FIGURE_LOCKS = defaultdict(threading.Lock)
+LOCKS_GUARD  = threading.Lock()
+
+
+def figurelock(path):
+    with LOCKS_GUARD:
+        return FIGURE_LOCKS[str(path)]
+
+
+def compileone(
+    name,
+    figdir,
+    preamble,
+    fmt        = None,
+    lyalgo_dir = LYALGO_DIR
+):
+    with figurelock(figdir / name):
+        return compilelocked(name, figdir, preamble, fmt, lyalgo_dir)
+
+
+def compilelocked(
+    name,
+    figdir,
+    preamble,
+    fmt        = None,
+    lyalgo_dir = LYALGO_DIR
+):
+    pdfpath = figdir / f"{name}.pdf"
+
+    if pdfpath.is_file():
+        return True
+
+# Each figure has its own folder, so the doc never sees a PDF half written.
+    workdir     = figdir / f"{name}-work"
+    wrapperpath = workdir / f"{name}.tex"
+
+    workdir.mkdir(parents = True, exist_ok = True)
+
+    with open(wrapperpath, mode = "w", encoding = "utf-8") as wrapperfile:
+        wrapperfile.write(
+            WRAPPER_TEMPLATE.format(
+                preamble = preamble,
+                dumpend  = DUMP_END,
+                figure   = (figdir / f"{name}.tkz").as_posix()
+            )
+        )
+
+# The working directory is the one of lyalgo.sty because this file uses
+# relative paths for the keywords.
+    with span("pdflatex algochart", cat = "tex", figure = name):
+        process = subprocess.run(
+            [PDFLATEX] + PDFLATEX_OPTIONS + fmtoptions(fmt) + [
+                "-halt-on-error",
+                f"-output-directory={workdir}",
+                str(wrapperpath)
+            ],
+            cwd    = lyalgo_dir,
+            env    = texenv(fmt = fmt),
+            stdin  = subprocess.DEVNULL,
+            stdout = subprocess.DEVNULL,
+            stderr = subprocess.DEVNULL
+        )
+
+    success = not process.returncode \
+          and (workdir / f"{name}.pdf").is_file()
+
+    if success:
+        os.replace(workdir / f"{name}.pdf", pdfpath)
+
+    shutil.rmtree(workdir, ignore_errors = True)
+
+    return success
+
+
+# The names in "failed" are not compiled again.
+def compilepending(
+    figdir,
+    preamble,
+    fmt        = None,
+    jobs       = 1,
+    failed     = None,
+    lyalgo_dir = LYALGO_DIR
+):
+    failed = set() if failed is None else failed
+    names  = [
+        name
+        for name in pendingfigures(figdir)
+        if name not in failed
+    ]
+
+    with ThreadPoolExecutor(max_workers = max(1, jobs)) as pool:
+        results = list(
+            pool.map(
+                lambda name: compileone(
+                    name       = name,
+                    figdir     = figdir,
+                    preamble   = preamble,
+                    fmt        = fmt,
+                    lyalgo_dir = lyalgo_dir
+                ),
+                names
+            )
+        )
+
+    for name, success in zip(names, results):
+        if not success:
+            failed.add(name)
+
+    return {
+        "compiled": sum(results),
+        "failed"  : len(results) - sum(results),
+    }
@@ -0,0 +1,347 @@
+#! /usr/bin/env python3
+
+# Declaration of the building steps : what each builder reads and writes.
+#
+# Patterns are globs relative to the root of the project. Use ``langtag``
+# for names like ``doc[fr].tex`` because brackets are special in globs.
+#
+# The ordering constraints are explicit : a step only starts when all the
+# steps named in its ``after`` list are finished. Independent steps are
+# launched at the same time in a pool of processes.
+#
+# The patterns are matched against the shared scan of the folders, so the
+# tree is not walked again for each pattern.
+#
+# By default, each builder is imported once by the worker process and its
+# function ``build`` is called. The old way, one Python subprocess for each
+# builder, is still available.
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import nullcontext
+import importlib.util
+import os
+import re
+import subprocess
+import sys
+import traceback
+
+from tools import FACTORY_DIR, PROJECT_DIR
+from tools.scan import Scan
+from tools.trace import flush, span
+
+
+# ----------- #
+# -- TOOLS -- #
+# ----------- #
+
+def langtag(lang):
+    return f"[[]{lang}]"
+
+
+SCAN = None
+
+
+def currentscan():
+    global SCAN
+
+    if SCAN is None:
+        SCAN = Scan.load()
+
+    else:
+        SCAN.refresh()
+
+    return SCAN
+
+
+def expand(patterns):
+    scan  = currentscan()
+    paths = set()
+
+    for pattern in patterns:
+        if scan.covers(pattern):
+            paths.update(scan.glob(pattern))
+
+        else:
+            paths.update(
+                onepath
+                for onepath in PROJECT_DIR.glob(pattern)
+                if onepath.is_file()
+                and "__pycache__" not in onepath.parts
+            )
+
+    return sorted(paths)
+
+
+# ---------- #
+# -- STEP -- #
+# ---------- #
+
+# The options in "watchoptions" are added when the step is launched again
+# by the watcher.
+class Step:
+    def __init__(
+        self,
+        name,
+        script,
+        inputs       = None,
+        outputs      = None,
+        after        = None,
+        options      = None,
+        watchoptions = None,
+        interactive  = False
+    ):
+        self.name         = name
+        self.script       = FACTORY_DIR / script
+        self.inputs       = inputs or []
+        self.outputs      = outputs or []
+        self.after        = after or []
+        self.options      = options or {}
+        self.watchoptions = watchoptions or {}
+        self.interactive  = interactive
+
+
+# A step without declared inputs cannot be checked, so it is always launched.
+    @property
+    def always(self):
+        return not self.inputs
+
+
+    def inputpaths(self):
+        return expand(self.inputs) + [self.script]
+
+
+    def outputpaths(self):
+        return expand(self.outputs)
+
+
+# ------------------------ #
+# -- CHECKING THE GRAPH -- #
+# ------------------------ #
+
+def checkgraph(steps):
+    bynames = {}
+
+    for step in steps:
+        if step.name in bynames:
+            raise ValueError(f'the step "{step.name}" is declared twice.')
+
+        bynames[step.name] = step
+
+    for step in steps:
+        for depname in step.after:
+            if depname not in bynames:
+                raise ValueError(
+                    f'the step "{step.name}" waits for '
+                    f'the unknown step "{depname}".'
+                )
+
+# Looking for cycles.
+    states = {}
+
+    def visit(step, path):
+        state = states.get(step.name)
+
+        if state == "done":
+            return
+
+        if state == "visiting":
+            cycle = " -> ".join(path + [step.name])
+
+            raise ValueError(f"cycle found in the steps : {cycle}")
+
+        states[step.name] = "visiting"
+
+        for depname in step.after:
+            visit(bynames[depname], path + [step.name])
+
+        states[step.name] = "done"
+
+    for step in steps:
+        visit(step, [])
+
+
+# ------------------------- #
+# -- LAUNCHING THE STEPS -- #
+# ------------------------- #
+
+BUILDERS = {}
+
+
+# A worker can live for a whole watching session : a builder changed since
+# its import is imported again.
+def loadbuilder(script):
+    script = str(script)
+    mtime  = os.stat(script).st_mtime_ns
+
+    if script not in BUILDERS \
+    or BUILDERS[script][0] != mtime:
+        name = re.sub(r"\W", "_", script)
+        spec = importlib.util.spec_from_file_location(name, script)
+
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        BUILDERS[script] = (mtime, module)
+
+    return BUILDERS[script][1]
+
+
+# The spans of a worker are written after each builder because the worker
+# never ends normally.
+def runbuilder(script, options):
+    try:
+        with span(script.stem, cat = "builder"):
+            loadbuilder(script).build(**options)
+
+    except SystemExit as error:
+        return 0 if error.code is None else error.code
+
+    except Exception:
+        traceback.print_exc()
+        return 1
+
+    finally:
+        sys.stdout.flush()
+        flush()
+
+    return 0
+
+
+# A boolean option is a flag of the command line.
+def runscript(script, options):
+    args = []
+
+    for key, value in options.items():
+        if value is True:
+            args.append(f"--{key}")
+
+        elif value is not False:
+            args += [f"--{key}", str(value)]
+
+    with span(script.stem, cat = "builder"):
+        process = subprocess.run([sys.executable, str(script)] + args)
+
+    return process.returncode
+
+
+# A pool given is not shut down, so its workers and the builders they have
+# imported can be used by the next launch.
+def launch(
+    steps,
+    manifest,
+    jobs      = 1,
+    force     = False,
+    inprocess = True,
+    pool      = None
+):
+    checkgraph(steps)
+
+    runner = runbuilder if inprocess else runscript
+
+    waiting = list(steps)
+    done    = set()
+    running = {}
+    failed  = []
+
+    def needed(step):
+        if force or step.always:
+            return True
+
+        with span("up to date check", cat = "fs", step = step.name):
+            return not manifest.isuptodate(
+                step.name,
+                step.inputpaths(),
+                step.outputpaths(),
+                step.options
+            )
+
+    def finish(step, returncode):
+        filename = step.script.stem
+
+        if returncode:
+            failed.append(step.name)
+
+            print(f'+ "{filename}" has failed.')
+            return
+
+        if not step.always:
+            manifest.record(
+                step.name,
+                step.inputpaths(),
+                step.outputpaths(),
+                step.options
+            )
+
+        done.add(step.name)
+
+        if jobs > 1:
+            print(f'+ "{filename}" finished.')
+
+    if pool is None:
+        poolcontext = ProcessPoolExecutor(max_workers = jobs)
+
+    else:
+        poolcontext = nullcontext(pool)
+
+    with poolcontext as pool:
+        while waiting or running:
+            launched = True
+
+            while launched and waiting and not failed:
+                launched = False
+
+                for step in waiting:
+                    if not all(
+                        depname in done
+                        for depname in step.after
+                    ):
+                        continue
+
+# An interactive step needs the terminal for itself.
+                    if step.interactive and running:
+                        continue
+
+                    waiting.remove(step)
+                    launched = True
+                    filename = step.script.stem
+
+                    if not needed(step):
+                        print(f'+ Skipping "{filename}"  [nothing has changed]')
+
+                        done.add(step.name)
+                        break
+
+                    print(f'+ Launching "{filename}"')
+
+# A failing step must be relaunched next time.
+                    manifest.forget(step.name)
+
+                    if step.interactive:
+                        finish(step, runner(step.script, step.options))
+
+                    else:
+                        future = pool.submit(
+                            runner,
+                            step.script,
+                            step.options
+                        )
+
+                        running[future] = step
+
+                    break
+
+            if failed:
+                waiting = []
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when = FIRST_COMPLETED)
+
+            for future in finished:
+                finish(running.pop(future), future.result())
+
+    manifest.save()
+    currentscan().save()
+
+    return not failed
@@ -0,0 +1,198 @@
+#! /usr/bin/env python3
+
+# Partial builds of a doc made of ``\include`` units.
+#
+# Each unit has a key given by its content and by the examples it uses,
+# shown with ``\codeasideoutput`` or read with ``\input`` or ``\justcode``.
+# For a partial build, only the units whose key has changed are typeset
+# thanks to ``\includeonly``. The ``.aux`` files of the other units give the
+# page numbers and the references, so they are kept in ``x-cache/doc`` after
+# each compilation, and put back before the next one.
+#
+# The list for ``\includeonly`` is in the file ``<jobname>-includeonly.tex``
+# that the doc reads at the end of its preamble if it exists.
+
+import hashlib
+import json
+import os
+import re
+import shutil
+
+from tools import CACHE_DIR, LYALGO_DIR
+from tools.latex import AUX_EXTS, stylehash
+from tools.manifest import filehash
+
+
+# --------------- #
+# -- CONSTANTS -- #
+# --------------- #
+
+DOC_CACHE_DIR = CACHE_DIR / "doc"
+
+PATTERN_EXAMPLE = re.compile(r"\{(examples/[^{}]+)\}")
+
+
+# ----------- #
+# -- TOOLS -- #
+# ----------- #
+
+def unitexamples(content):
+    return sorted(set(PATTERN_EXAMPLE.findall(content)))
+
+
+def unitkey(content, lyalgo_dir = LYALGO_DIR):
+    hasher = hashlib.sha256()
+
+    hasher.update(content.encode("utf-8"))
+
+    for example in unitexamples(content):
+        if (lyalgo_dir / example).is_file():
+            hasher.update(example.encode("utf-8"))
+            hasher.update(filehash(lyalgo_dir / example).encode("utf-8"))
+
+    return hasher.hexdigest()
+
+
+def globalkey(preamble, lyalgo_dir = LYALGO_DIR):
+    hasher = hashlib.sha256()
+
+    hasher.update(preamble.encode("utf-8"))
+    hasher.update(stylehash(lyalgo_dir).encode("utf-8"))
+
+    return hasher.hexdigest()
+
+
+def statepath(jobname, cache_dir = DOC_CACHE_DIR):
+    return cache_dir / f"{jobname}-units.json"
+
+
+def includeonlypath(jobname, cache_dir = DOC_CACHE_DIR):
+    return cache_dir / f"{jobname}-includeonly.tex"
+
+
+def stashdir(jobname, cache_dir = DOC_CACHE_DIR):
+    return cache_dir / f"{jobname}-aux"
+
+
+# ----------- #
+# -- STATE -- #
+# ----------- #
+
+def readstate(jobname, cache_dir = DOC_CACHE_DIR):
+    try:
+        with open(statepath(jobname, cache_dir), encoding = "utf-8") as jsonfile:
+            return json.load(jsonfile)
+
+# No state or a broken one only means a full build.
+    except (ValueError, OSError):
+        return {"global": None, "units": {}}
+
+
+def savestate(jobname, state, cache_dir = DOC_CACHE_DIR):
+    cache_dir.mkdir(parents = True, exist_ok = True)
+
+    path    = statepath(jobname, cache_dir)
+    tmppath = path.with_suffix(".tmp")
+
+    with open(tmppath, mode = "w", encoding = "utf-8") as jsonfile:
+        json.dump(state, jsonfile, indent = 1, sort_keys = True)
+
+    os.replace(tmppath, path)
+
+
+# The units to typeset, or None for all of them.
+def unitstobuild(jobname, keys, gkey, cache_dir = DOC_CACHE_DIR):
+    state = readstate(jobname, cache_dir)
+
+    if state["global"] != gkey:
+        return None
+
+    return [
+        unit
+        for unit, key in keys.items()
+        if state["units"].get(unit) != key
+        or not (stashdir(jobname, cache_dir) / f"{unit}.aux").is_file()
+    ]
+
+
+def updatestate(jobname, keys, gkey, built, cache_dir = DOC_CACHE_DIR):
+    state = readstate(jobname, cache_dir)
+
+    if built is None:
+        state = {"global": gkey, "units": {}}
+        built = list(keys)
+
+    for unit in built:
+        state["units"][unit] = keys[unit]
+
+    state["units"] = {
+        unit: key
+        for unit, key in state["units"].items()
+        if unit in keys
+    }
+
+    savestate(jobname, state, cache_dir)
+
+
+# ------------------ #
+# -- INCLUDE ONLY -- #
+# ------------------ #
+
+def writeincludeonly(jobname, units, unitdir, cache_dir = DOC_CACHE_DIR):
+    path = includeonlypath(jobname, cache_dir)
+
+    if units is None:
+        if path.is_file():
+            path.unlink()
+
+        return
+
+    cache_dir.mkdir(parents = True, exist_ok = True)
+
+    with open(path, mode = "w", encoding = "utf-8") as texfile:
+        texfile.write(
+            "% File generated by the factory : partial build.\n"
+            "\\includeonly{"
+            + ",".join(f"{unitdir}/{unit}" for unit in units)
+            + "}\n"
+        )
+
+
+# -------------------------- #
+# -- AUXILIARY FILES KEPT -- #
+# -------------------------- #
+
+def auxpaths(texpath, unitsdir):
+    return [
+        texpath.parent / f"{texpath.stem}{ext}"
+        for ext in AUX_EXTS
+    ] + sorted(unitsdir.glob("*.aux"))
+
+
+def stashaux(texpath, unitsdir, cache_dir = DOC_CACHE_DIR):
+    destdir = stashdir(texpath.stem, cache_dir)
+
+    destdir.mkdir(parents = True, exist_ok = True)
+
+    for auxpath in auxpaths(texpath, unitsdir):
+        if auxpath.is_file():
+            shutil.copyfile(auxpath, destdir / auxpath.name)
+
+
+def restoreaux(texpath, unitsdir, cache_dir = DOC_CACHE_DIR):
+    sourcedir = stashdir(texpath.stem, cache_dir)
+
+    if not sourcedir.is_dir():
+        return
+
+    mainnames = [f"{texpath.stem}{ext}" for ext in AUX_EXTS]
+
+    for auxpath in sourcedir.iterdir():
+        if auxpath.name in mainnames:
+            dest = texpath.parent / auxpath.name
+
+        else:
+            dest = unitsdir / auxpath.name
+
+        if not dest.is_file():
+            shutil.copyfile(auxpath, dest)
@@ -0,0 +1,310 @@
+#! /usr/bin/env python3
+
+# Compilations with ``pdflatex``.
+#
+# The working directory is given to the subprocess instead of using ``cd``,
+# so several compilations can be driven at the same time from threads.
+#
+# By default, a document is compiled until its auxiliary files are stable :
+# they are hashed after each pass, and the compilation stops as soon as a
+# pass leaves them unchanged, or when the maximum number of passes is reached.
+#
+# The fixed preamble of the doc can be dumped in a format file with the
+# package ``mylatexformat``. This format is named from the hash of the
+# preamble and of the style files of lyalgo, so it is only dumped again when
+# one of them changes. When a format is used, ``pdflatex`` skips the preamble
+# of the document up to ``\endofdump`` or ``\begin{document}``. What comes
+# after ``DUMP_END`` in a preamble is not dumped : it is read at each run.
+#
+# With ``\include``, the auxiliary files of the included files are also
+# checked : give their folders with ``auxdirs``.
+#
+# Each compilation uses the recorder of ``pdflatex`` : the files read by all
+# the passes are returned with the number of passes.
+#
+# After a fatal error, like an emergency stop, the next passes are not done.
+#
+# A hook can be called before each pass : it receives the number of the
+# pass. Another one, ``pending``, tells if the last pass has left work not
+# seen in the auxiliary files, like figures to include : the compilation is
+# then not stable. With ``openany``, TeX can write files outside of the
+# working directory, for example the externalized figures.
+
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
+import subprocess
+import threading
+
+from tools import CACHE_DIR, LYALGO_DIR
+from tools.manifest import filehash
+from tools.recorder import flspath, readfls, RECORDER_OPTION
+from tools.texlog import isfatal, logpath
+from tools.trace import span
+
+
+# --------------- #
+# -- CONSTANTS -- #
+# --------------- #
+
+PDFLATEX = "pdflatex"
+
+PDFLATEX_OPTIONS = [
+    "-interaction=nonstopmode",
+    "-file-line-error",
+    RECORDER_OPTION,
+]
+
+AUX_EXTS = [".aux", ".toc", ".out"]
+
+MAX_PASSES = 3
+
+FMT_DIR = CACHE_DIR / "format"
+FMT_PREFIX = "lyalgo-"
+
+# Without format, "\endofdump" must be defined by hand.
+DUMP_END = r"""
+\expandafter\providecommand\csname endofdump\endcsname{}
+\endofdump
+""".strip()
+
+
+# ----------- #
+# -- TOOLS -- #
+# ----------- #
+
+def stylepaths(lyalgo_dir = LYALGO_DIR):
+    return sorted(lyalgo_dir.glob("*.sty")) \
+         + sorted(lyalgo_dir.glob("keywords/*.sty"))
+
+
+def stylehash(lyalgo_dir = LYALGO_DIR):
+    hasher = hashlib.sha256()
+
+    for stypath in stylepaths(lyalgo_dir):
+        hasher.update(stypath.name.encode("utf-8"))
+        hasher.update(filehash(stypath).encode("utf-8"))
+
+    return hasher.hexdigest()
+
+
+def texenv(texinputs = None, fmt = None, openany = False):
+    env = dict(os.environ)
+
+# The final separators keep the default paths of the TeX distribution.
+    if texinputs:
+        env["TEXINPUTS"] = os.pathsep.join(
+            ["."] + [str(onedir) for onedir in texinputs] + [""]
+        )
+
+    if fmt:
+        env["TEXFORMATS"] = os.pathsep.join([str(FMT_DIR), ""])
+
+    if openany:
+        env["openout_any"] = "a"
+
+    return env
+
+
+def fmtoptions(fmt):
+    if fmt:
+        return [f"-fmt={fmt}"]
+
+    return []
+
+
+def extractpreamble(content):
+    preamble = content.split("\\begin{document}")[0]
+    preamble = preamble.split(DUMP_END)[0]
+
+    return preamble.rstrip() + "\n"
+
+
+def auxstate(texpath, auxdirs = None):
+    state = {}
+
+    for ext in AUX_EXTS:
+        auxpath = texpath.parent / f"{texpath.stem}{ext}"
+
+        if auxpath.is_file():
+            state[ext] = filehash(auxpath)
+
+    for auxdir in auxdirs or []:
+        for auxpath in sorted(auxdir.glob("*.aux")):
+            state[str(auxpath)] = filehash(auxpath)
+
+    return state
+
+
+# ------------------------ #
+# -- FORMAT OF PREAMBLE -- #
+# ------------------------ #
+
+# The family, for example the language of a doc, allows several formats to
+# live together.
+def fmtprefix(family = ""):
+    if family:
+        return f"{FMT_PREFIX}{family}-"
+
+    return FMT_PREFIX
+
+
+def fmtname(preamble, lyalgo_dir = LYALGO_DIR, family = ""):
+    hasher = hashlib.sha256()
+
+    hasher.update(preamble.encode("utf-8"))
+    hasher.update(stylehash(lyalgo_dir).encode("utf-8"))
+
+    return fmtprefix(family) + hasher.hexdigest()[:16]
+
+
+def dumpformat(
+    preamble,
+    lyalgo_dir = LYALGO_DIR,
+    fmt_dir    = FMT_DIR,
+    family     = ""
+):
+    name = fmtname(preamble, lyalgo_dir, family)
+
+    if (fmt_dir / f"{name}.fmt").is_file():
+        return name
+
+    fmt_dir.mkdir(parents = True, exist_ok = True)
+
+# Old formats of the same family are useless.
+    for oldpath in fmt_dir.glob(fmtprefix(family) + "?"*16 + ".*"):
+        oldpath.unlink(missing_ok = True)
+
+# The format is dumped under a name of its own, and then renamed : two
+# processes dumping the same format never give a broken file.
+    tmpname    = f"{name}-tmp-{os.getpid()}-{threading.get_ident()}"
+    sourcepath = fmt_dir / f"{tmpname}.tex"
+
+    with open(sourcepath, mode = "w", encoding = "utf-8") as sourcefile:
+        sourcefile.write(
+            preamble + "\n\\begin{document}\n\\end{document}\n"
+        )
+
+# The working directory is the one of lyalgo.sty because this file uses
+# relative paths for the keywords.
+    with span("pdflatex format", cat = "tex", fmt = name):
+        process = subprocess.run(
+            [
+                PDFLATEX,
+                "-ini",
+                f"-jobname={tmpname}",
+                f"-output-directory={fmt_dir}",
+            ] + PDFLATEX_OPTIONS + [
+                "&pdflatex",
+                "mylatexformat.ltx",
+                str(sourcepath)
+            ],
+            cwd    = lyalgo_dir,
+            stdout = subprocess.DEVNULL,
+            stderr = subprocess.DEVNULL
+        )
+
+    tmpfmt  = fmt_dir / f"{tmpname}.fmt"
+    success = not process.returncode and tmpfmt.is_file()
+
+    if success:
+        os.replace(tmpfmt, fmt_dir / f"{name}.fmt")
+
+    for tmppath in fmt_dir.glob(f"{tmpname}.*"):
+        if tmppath.suffix == ".log":
+            os.replace(tmppath, fmt_dir / f"{name}.log")
+
+        else:
+            tmppath.unlink(missing_ok = True)
+
+    if not success:
+        return None
+
+    return name
+
+
+# ------------------ #
+# -- COMPILATIONS -- #
+# ------------------ #
+
+def pdfcompile(
+    texpath,
+    maxpasses  = MAX_PASSES,
+    converge   = True,
+    texinputs  = None,
+    fmt        = None,
+    auxdirs    = None,
+    openany    = False,
+    beforepass = None,
+    pending    = None
+):
+    returncode = 0
+    lastpass   = 0
+    state      = auxstate(texpath, auxdirs)
+    inputs     = set()
+
+    for lastpass in range(1, maxpasses + 1):
+        if beforepass is not None:
+            beforepass(lastpass)
+
+        with span(
+            "pdflatex pass",
+            cat    = "tex",
+            file   = texpath.name,
+            nbpass = lastpass
+        ):
+            process = subprocess.run(
+                [PDFLATEX] + PDFLATEX_OPTIONS + fmtoptions(fmt) + [texpath.name],
+                cwd = texpath.parent,
+                env = texenv(texinputs, fmt, openany)
+            )
+
+        returncode = process.returncode
+        inputs    |= readfls(flspath(texpath))
+
+        if isfatal(logpath(texpath)):
+            break
+
+        if converge:
+            newstate = auxstate(texpath, auxdirs)
+
+            if newstate == state \
+            and (pending is None or not pending()):
+                break
+
+            state = newstate
+
+    return returncode, lastpass, inputs
+
+
+def pdfcompileall(
+    texpaths,
+    maxpasses  = MAX_PASSES,
+    converge   = True,
+    texinputs  = None,
+    fmts       = None,
+    jobs       = 1,
+    auxdirs    = None,
+    openany    = False,
+    beforepass = None,
+    pending    = None
+):
+    fmts = fmts or {}
+
+    with ThreadPoolExecutor(max_workers = max(1, jobs)) as pool:
+        return list(
+            pool.map(
+                lambda texpath: pdfcompile(
+                    texpath,
+                    maxpasses,
+                    converge,
+                    texinputs,
+                    fmts.get(texpath.name),
+                    auxdirs,
+                    openany,
+                    beforepass,
+                    pending
+                ),
+                texpaths
+            )
+        )
@@ -0,0 +1,209 @@
+#! /usr/bin/env python3
+
+# Content hashes of the files read and written by the building steps.
+#
+# The manifest is a JSON file with three tables.
+#
+#     * "files" is a stat cache : ``relpath -> [size, mtime_ns, hash]``.
+#       A file is only rehashed when its size or its mtime has changed.
+#
+#     * "steps" keeps, for each step, the hashes of its inputs and outputs
+#       just after its last successful run.
+#
+#     * "pdfs" keeps, for each PDF compiled by a builder, the hashes of the
+#       files read by ``pdflatex`` during its last successful compilation.
+#
+# A builder launched by ``launch.py`` updates "pdfs" while the main process
+# holds its own manifest : when saving, only the PDFs recorded or forgotten
+# by this manifest replace the ones found in the file.
+
+import hashlib
+import json
+import os
+
+from tools import CACHE_DIR, PROJECT_DIR
+
+
+# --------------- #
+# -- CONSTANTS -- #
+# --------------- #
+
+MANIFEST_PATH = CACHE_DIR / "manifest.json"
+
+CHUNK_SIZE = 1 << 16
+
+
+# ----------- #
+# -- TOOLS -- #
+# ----------- #
+
+def filehash(path):
+    hasher = hashlib.sha256()
+
+    with open(path, mode = "rb") as onefile:
+        for chunk in iter(lambda: onefile.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+
+    return hasher.hexdigest()
+
+
+def relpath(path):
+    return os.path.relpath(path, PROJECT_DIR).replace(os.sep, "/")
+
+
+# -------------- #
+# -- MANIFEST -- #
+# -------------- #
+
+class Manifest:
+    def __init__(self, path = MANIFEST_PATH):
+        self.path  = path
+        self.files = {}
+        self.steps = {}
+        self.pdfs  = {}
+
+        self.changedpdfs = {}
+
+        if self.path.is_file():
+            try:
+                with open(self.path, encoding = "utf-8") as jsonfile:
+                    content = json.load(jsonfile)
+
+                self.files = content.get("files", {})
+                self.steps = content.get("steps", {})
+                self.pdfs  = content.get("pdfs", {})
+
+# A broken manifest only means that everything will be rebuilt.
+            except (ValueError, OSError):
+                pass
+
+
+    def hash(self, path):
+        rel = relpath(path)
+
+        try:
+            infos = os.stat(path)
+
+        except FileNotFoundError:
+            self.files.pop(rel, None)
+            return None
+
+        cached = self.files.get(rel)
+
+        if cached \
+        and cached[0] == infos.st_size \
+        and cached[1] == infos.st_mtime_ns:
+            return cached[2]
+
+        hashed = filehash(path)
+
+        self.files[rel] = [infos.st_size, infos.st_mtime_ns, hashed]
+
+        return hashed
+
+
+    def snapshot(self, paths):
+        return {
+            relpath(onepath): self.hash(onepath)
+            for onepath in paths
+        }
+
+
+# The options of a step are kept, so a step launched with other options,
+# like ``--externalize`` for the doc, is not seen as up to date.
+    def isuptodate(self, name, inputs, outputs, options = None):
+        lastrun = self.steps.get(name)
+
+        if lastrun is None:
+            return False
+
+        return lastrun.get("options", {}) == (options or {}) \
+           and lastrun["inputs"] == self.snapshot(inputs) \
+           and lastrun["outputs"] == self.snapshot(outputs)
+
+
+    def record(self, name, inputs, outputs, options = None):
+        self.steps[name] = {
+            "options": options or {},
+            "inputs" : self.snapshot(inputs),
+            "outputs": self.snapshot(outputs),
+        }
+
+
+    def forget(self, name):
+        self.steps.pop(name, None)
+
+
+# A key gives what the files do not say, like the options of the compilation.
+    def pdfisuptodate(self, pdfpath, key):
+        lastrun = self.pdfs.get(relpath(pdfpath))
+
+        if lastrun is None \
+        or lastrun["key"] != key \
+        or lastrun["pdf"] != self.hash(pdfpath):
+            return False
+
+        return all(
+            self.hash(PROJECT_DIR / rel) == hashed
+            for rel, hashed in lastrun["inputs"].items()
+        )
+
+
+    def recordpdf(self, pdfpath, key, inputs):
+        rel = relpath(pdfpath)
+
+        self.pdfs[rel] = self.changedpdfs[rel] = {
+            "key"   : key,
+            "pdf"   : self.hash(pdfpath),
+            "inputs": self.snapshot(inputs),
+        }
+
+
+    def forgetpdf(self, pdfpath):
+        rel = relpath(pdfpath)
+
+        self.pdfs.pop(rel, None)
+        self.changedpdfs[rel] = None
+
+
+    def mergedpdfs(self):
+        pdfs = {}
+
+        if self.path.is_file():
+            try:
+                with open(self.path, encoding = "utf-8") as jsonfile:
+                    pdfs = json.load(jsonfile).get("pdfs", {})
+
+            except (ValueError, OSError):
+                pass
+
+        for rel, lastrun in self.changedpdfs.items():
+            if lastrun is None:
+                pdfs.pop(rel, None)
+
+            else:
+                pdfs[rel] = lastrun
+
+        return pdfs
+
+
+    def save(self):
+        self.pdfs = self.mergedpdfs()
+
+        self.path.parent.mkdir(parents = True, exist_ok = True)
+
+        tmppath = self.path.with_suffix(".tmp")
+
+        with open(tmppath, mode = "w", encoding = "utf-8") as jsonfile:
+            json.dump(
+                {
+                    "files": self.files,
+                    "steps": self.steps,
+                    "pdfs" : self.pdfs,
+                },
+                jsonfile,
+                indent    = 1,
+                sort_keys = True
+            )
+
+        os.replace(tmppath, self.path)
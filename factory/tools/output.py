@@ -0,0 +1,104 @@
+#! /usr/bin/env python3
+
+# Writing of the files produced by the builders.
+#
+# A file is only written if its content changes, so its modification time
+# is kept otherwise : tools checking the dates do not redo their work.
+# The new content goes first in a temporary file which is then renamed, so
+# a file is never seen half written.
+
+import filecmp
+import os
+import shutil
+
+
+# ----------- #
+# -- TOOLS -- #
+# ----------- #
+
+def tmppath(path):
+    return path.parent / f"{path.name}.tmp"
+
+
+def samecontent(path, content):
+    try:
+        with open(path, encoding = "utf-8") as onefile:
+            return onefile.read() == content
+
+    except (OSError, UnicodeDecodeError):
+        return False
+
+
+def samefile(source, dest):
+    try:
+        return os.stat(source).st_size == os.stat(dest).st_size \
+           and filecmp.cmp(source, dest, shallow = False)
+
+    except OSError:
+        return False
+
+
+def writetext(path, content):
+    if samecontent(path, content):
+        return False
+
+    path.parent.mkdir(parents = True, exist_ok = True)
+
+    with open(tmppath(path), mode = "w", encoding = "utf-8") as onefile:
+        onefile.write(content)
+
+    os.replace(tmppath(path), path)
+
+    return True
+
+
+def copyfile(source, dest):
+    if samefile(source, dest):
+        return False
+
+    dest.parent.mkdir(parents = True, exist_ok = True)
+
+    shutil.copyfile(source, tmppath(dest))
+    os.replace(tmppath(dest), dest)
+
+    return True
+
+
+# ------------- #
+# -- OUTPUTS -- #
+# ------------- #
+
+class Outputs:
+    def __init__(self):
+        self.paths   = []
+        self.changed = []
+
+
+    def add(self, path, changed):
+        self.paths.append(path)
+
+        if changed:
+            self.changed.append(path)
+
+        return changed
+
+
+    def write(self, path, content):
+        return self.add(path, writetext(path, content))
+
+
+    def copy(self, source, dest):
+        return self.add(dest, copyfile(source, dest))
+
+
+# The outputs of a builder working in several threads.
+    def extend(self, other):
+        self.paths   += other.paths
+        self.changed += other.changed
+
+
+    def summary(self):
+        return (
+            f"{len(set(self.changed))} file(s) changed "
+            f"out of {len(set(self.paths))}."
+        )
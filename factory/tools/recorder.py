@@ -0,0 +1,75 @@
+#! /usr/bin/env python3
+
+# Files really read by ``pdflatex``.
+#
+# With the option ``-recorder``, each compilation writes a file
+# ``<jobname>.fls`` listing the files opened. The relative paths are given
+# from the working directory of the compilation, which is the first line of
+# the file.
+#
+#     PWD /path/of/the/compilation
+#     INPUT /usr/share/texmf/tex/latex/base/article.cls
+#     INPUT ./lyalgo-doc[fr].tex
+#     OUTPUT lyalgo-doc[fr].log
+#
+# The files written by the compilation, like the ``.aux`` files, are also
+# read : they are not dependencies of the PDF.
+
+import os
+from pathlib import Path
+
+
+# --------------- #
+# -- CONSTANTS -- #
+# --------------- #
+
+RECORDER_OPTION = "-recorder"
+
+# The special files of the system are not dependencies.
+IGNORED_PREFIXES = ["/dev/", "/proc/"]
+
+
+# ----------- #
+# -- TOOLS -- #
+# ----------- #
+
+def flspath(texpath):
+    return texpath.parent / f"{texpath.stem}.fls"
+
+
+def readfls(path):
+    pwd     = path.parent
+    inputs  = set()
+    outputs = set()
+
+    try:
+        with open(path, encoding = "utf-8", errors = "replace") as flsfile:
+            lines = flsfile.read().splitlines()
+
+    except FileNotFoundError:
+        return set()
+
+    for line in lines:
+        kind, _, name = line.partition(" ")
+
+        if kind == "PWD":
+            pwd = Path(name)
+            continue
+
+        if kind not in ["INPUT", "OUTPUT"] or not name:
+            continue
+
+        onepath = os.path.normpath(pwd / name)
+
+        if kind == "INPUT":
+            inputs.add(onepath)
+
+        else:
+            outputs.add(onepath)
+
+    return {
+        Path(onepath)
+        for onepath in inputs - outputs
+        if not any(onepath.startswith(prefix) for prefix in IGNORED_PREFIXES)
+        and os.path.isfile(onepath)
+    }
@@ -0,0 +1,366 @@
+#! /usr/bin/env python3
+
+# Rendering of snippets of lyalgo, for example for exercise sheets.
+#
+# Like the examples of the doc, each snippet is typeset alone with the
+# package ``preview`` and cropped. The preamble is dumped once in a format,
+# so each compilation starts with lyalgo already loaded.
+#
+# ``pdflatex`` writes only one PDF by run, so a worker is a thread keeping
+# its own folder, and launching each compilation with the warm format. Each
+# pool has its own temporary folder in ``x-cache/render``, and the family of
+# its format is given by its preamble : several pools, in one process or in
+# several ones, never use nor remove the files of each other.
+#
+# The workers stay alive between the batches given to the same pool : there
+# is one worker by core by default.
+#
+# The snippets can come from a stream : only a few of them wait in the pool,
+# and the results are given in the order of the snippets. A broken snippet
+# gives a result with its error, the other snippets are still rendered.
+#
+# The SVG files are made from the PDF ones with ``pdftocairo`` or
+# ``dvisvgm`` if one of them is installed.
+#
+# By default, the preamble only loads lyalgo with the English keywords :
+# without a language, the keywords of lyalgo are not defined.
+#
+# With a render cache, see ``tools.rendercache``, a snippet already rendered
+# with the same options and the same lyalgo is only copied.
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import itertools
+import os
+from pathlib import Path
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from tools import CACHE_DIR, LYALGO_DIR
+from tools.latex import (
+    DUMP_END,
+    dumpformat,
+    fmtoptions,
+    PDFLATEX,
+    PDFLATEX_OPTIONS,
+    texenv
+)
+from tools.smoke import MINIMAL_PREAMBLE
+from tools.texlog import analysefile, errorline
+
+
+# --------------- #
+# -- CONSTANTS -- #
+# --------------- #
+
+RENDER_DIR = CACHE_DIR / "render"
+
+FORMATS = ["pdf", "svg"]
+
+TIMEOUT = 60
+
+DEFAULT_WIDTH = r"\linewidth"
+
+RENDER_PREAMBLE = r"""
+\documentclass{{article}}
+
+{preamble}
+""".lstrip()
+
+RENDER_TEMPLATE = r"""
+{preamble}
+{dumpend}
+
+\usepackage[active, tightpage]{{preview}}
+
+\begin{{document}}
+
+\begin{{preview}}
+\begin{{minipage}}{{{width}}}
+    \input{{{snippet}}}
+\end{{minipage}}
+\end{{preview}}
+
+\end{{document}}
+""".lstrip()
+
+SVG_CONVERTERS = [
+    ("pdftocairo", lambda pdf, svg: ["pdftocairo", "-svg", pdf, svg]),
+    ("dvisvgm"   , lambda pdf, svg: ["dvisvgm", "--pdf", "-o", svg, pdf]),
+]
+
+
+# ----------- #
+# -- TOOLS -- #
+# ----------- #
+
+def svgcommand(pdfpath, svgpath):
+    for name, command in SVG_CONVERTERS:
+        if shutil.which(name):
+            return command(str(pdfpath), str(svgpath))
+
+    return None
+
+
+# Only the formats of the pools with the same preamble are removed when
+# lyalgo changes.
+def fmtfamily(preamble):
+    return "render-" + hashlib.sha256(
+        preamble.encode("utf-8")
+    ).hexdigest()[:8]
+
+
+def newresult(index, name):
+    return {
+        "index"  : index,
+        "name"   : name,
+        "success": False,
+        "output" : None,
+        "error"  : "",
+        "time"   : 0.0,
+        "cached" : False,
+    }
+
+
+# ------------- #
+# -- WORKERS -- #
+# ------------- #
+
+class TeXWorker:
+    def __init__(
+        self,
+        workdir,
+        preamble,
+        fmt        = None,
+        width      = DEFAULT_WIDTH,
+        timeout    = TIMEOUT,
+        lyalgo_dir = LYALGO_DIR
+    ):
+        self.workdir    = workdir
+        self.fmt        = fmt
+        self.timeout    = timeout
+        self.lyalgo_dir = lyalgo_dir
+        self.texpath    = workdir / "job.tex"
+        self.snippath   = workdir / "snippet.tex"
+
+        workdir.mkdir(parents = True, exist_ok = True)
+
+# The wrapper never changes : only the snippet is written for each job.
+        with open(self.texpath, mode = "w", encoding = "utf-8") as texfile:
+            texfile.write(
+                RENDER_TEMPLATE.format(
+                    preamble = preamble,
+                    dumpend  = DUMP_END,
+                    width    = width,
+                    snippet  = self.snippath.as_posix()
+                )
+            )
+
+
+    def compile(self, source):
+        with open(self.snippath, mode = "w", encoding = "utf-8") as snipfile:
+            snipfile.write(source)
+
+        pdfpath = self.workdir / "job.pdf"
+
+        if pdfpath.is_file():
+            pdfpath.unlink()
+
+# The working directory is the one of lyalgo.sty because this file uses
+# relative paths for the keywords.
+        try:
+            process = subprocess.run(
+                [PDFLATEX] + PDFLATEX_OPTIONS + fmtoptions(self.fmt) + [
+                    "-halt-on-error",
+                    f"-output-directory={self.workdir}",
+                    str(self.texpath)
+                ],
+                cwd     = self.lyalgo_dir,
+                env     = texenv(fmt = self.fmt),
+                stdin   = subprocess.DEVNULL,
+                stdout  = subprocess.DEVNULL,
+                stderr  = subprocess.DEVNULL,
+                timeout = self.timeout
+            )
+
+        except subprocess.TimeoutExpired:
+            return None, f"Timeout after {self.timeout} s."
+
+        if process.returncode or not pdfpath.is_file():
+            errors = analysefile(self.workdir / "job.log")["errors"]
+
+            if errors:
+                return None, errorline(errors[0])
+
+            return None, "Compilation failed."
+
+        return pdfpath, ""
+
+
+    def render(self, source, dest):
+        pdfpath, error = self.compile(source)
+
+        if pdfpath is None:
+            return error
+
+        dest.parent.mkdir(parents = True, exist_ok = True)
+
+        if dest.suffix == ".svg":
+            command = svgcommand(pdfpath, dest)
+
+            if command is None:
+                return "No converter to SVG found."
+
+            process = subprocess.run(
+                command,
+                stdout = subprocess.DEVNULL,
+                stderr = subprocess.DEVNULL
+            )
+
+            if process.returncode:
+                return "Conversion to SVG failed."
+
+        else:
+            os.replace(pdfpath, dest)
+
+        return ""
+
+
+# ---------- #
+# -- POOL -- #
+# ---------- #
+
+class RenderPool:
+    def __init__(
+        self,
+        preamble   = MINIMAL_PREAMBLE,
+        jobs       = None,
+        width      = DEFAULT_WIDTH,
+        timeout    = TIMEOUT,
+        usefmt     = True,
+        cache      = None,
+        lyalgo_dir = LYALGO_DIR,
+        render_dir = RENDER_DIR
+    ):
+        self.preamble   = RENDER_PREAMBLE.format(preamble = preamble)
+        self.jobs       = max(1, jobs or os.cpu_count() or 1)
+        self.width      = width
+        self.timeout    = timeout
+        self.cache      = cache
+        self.lyalgo_dir = lyalgo_dir
+
+        render_dir.mkdir(parents = True, exist_ok = True)
+
+        self.pool_dir = Path(
+            tempfile.mkdtemp(prefix = "pool-", dir = render_dir)
+        )
+
+        self.fmt = dumpformat(
+            self.preamble,
+            lyalgo_dir = lyalgo_dir,
+            family     = fmtfamily(self.preamble)
+        ) if usefmt else None
+
+        self.local    = threading.local()
+        self.counter  = itertools.count()
+        self.executor = ThreadPoolExecutor(
+            max_workers = self.jobs,
+            initializer = self.startworker
+        )
+
+
+    def startworker(self):
+        self.local.worker = TeXWorker(
+            workdir    = self.pool_dir / f"worker-{next(self.counter)}",
+            preamble   = self.preamble,
+            fmt        = self.fmt,
+            width      = self.width,
+            timeout    = self.timeout,
+            lyalgo_dir = self.lyalgo_dir
+        )
+
+
+# What changes the file rendered, except the source and lyalgo.
+    def cacheoptions(self, ext):
+        return {
+            "preamble": self.preamble,
+            "width"   : self.width,
+            "ext"     : ext,
+        }
+
+
+    def renderone(self, index, name, source, dest):
+        result = newresult(index, name)
+        start  = time.time()
+        ext    = dest.suffix[1:]
+
+        try:
+            key = None
+
+            if self.cache is not None:
+                key = self.cache.key(source, self.cacheoptions(ext))
+
+                result["cached"] = self.cache.get(key, ext, dest)
+
+            if not result["cached"]:
+                result["error"] = self.local.worker.render(source, dest)
+
+                if key is not None and not result["error"]:
+                    self.cache.put(key, ext, dest)
+
+# One broken snippet must not stop the batch.
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+
+        result["time"] = time.time() - start
+
+        if not result["error"]:
+            result["success"] = True
+            result["output"]  = dest
+
+        return result
+
+
+# "snippets" gives pairs "(name, source)" : the name is the one of the output
+# file in "output_dir".
+    def render(self, snippets, output_dir, ext = "pdf"):
+        if ext not in FORMATS:
+            raise ValueError(f"unknown format << {ext} >>.")
+
+        pending = deque()
+
+        for index, (name, source) in enumerate(snippets):
+            pending.append(
+                self.executor.submit(
+                    self.renderone,
+                    index,
+                    name,
+                    source,
+                    output_dir / f"{name}.{ext}"
+                )
+            )
+
+# Only a few snippets wait in the pool.
+            while len(pending) > 2 * self.jobs:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+    def close(self):
+        self.executor.shutdown()
+
+        shutil.rmtree(self.pool_dir, ignore_errors = True)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,278 @@
+#! /usr/bin/env python3
+
+# Content-addressed cache of the snippets rendered.
+#
+# The key of a snippet is the hash of its source, of the style files of
+# lyalgo (``lyalgo*.sty`` and ``keywords/*.sty``) and of the options of the
+# rendering. A file rendered is stored in ``x-cache/render-cache`` under the
+# name given by its key.
+#
+# An index SQLite gives the size and the last use of each file. When the
+# files exceed the size budget, the ones used the longest time ago are
+# removed. SQLite locks the index, so several processes can share the cache.
+# The hits and the misses are counted in the index too.
+#
+# A key contains the hash of the style files, so the entries made with old
+# versions of lyalgo are never used again : they are removed as soon as the
+# cache is opened with new style files.
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+from tools import CACHE_DIR, LYALGO_DIR
+from tools.latex import stylehash
+
+
+# --------------- #
+# -- CONSTANTS -- #
+# --------------- #
+
+RENDER_CACHE_DIR = CACHE_DIR / "render-cache"
+
+INDEX_NAME = "index.sqlite"
+
+MAX_BYTES = 512 * 1024**2
+
+# Seconds waited for the lock of the index held by another process.
+LOCK_TIMEOUT = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key    TEXT PRIMARY KEY,
+    ext    TEXT NOT NULL,
+    size   INTEGER NOT NULL,
+    stykey TEXT NOT NULL,
+    used   REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+
+CREATE TABLE IF NOT EXISTS counters (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+# ----------- #
+# -- CACHE -- #
+# ----------- #
+
+class RenderCache:
+    def __init__(
+        self,
+        cache_dir  = RENDER_CACHE_DIR,
+        maxbytes   = MAX_BYTES,
+        lyalgo_dir = LYALGO_DIR
+    ):
+        self.cache_dir = cache_dir
+        self.maxbytes  = maxbytes
+        self.stykey    = stylehash(lyalgo_dir)
+        self.hits      = 0
+        self.misses    = 0
+        self.lock      = threading.RLock()
+
+        cache_dir.mkdir(parents = True, exist_ok = True)
+
+# The threads of one pool share the connection, the processes share the
+# file of the index.
+        self.connection = sqlite3.connect(
+            str(cache_dir / INDEX_NAME),
+            timeout           = LOCK_TIMEOUT,
+            isolation_level   = None,
+            check_same_thread = False
+        )
+
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(SCHEMA)
+
+        self.purge()
+
+
+    def key(self, source, options):
+        hasher = hashlib.sha256()
+
+        for text in [
+            source,
+            self.stykey,
+            json.dumps(options, sort_keys = True),
+        ]:
+            hasher.update(text.encode("utf-8"))
+            hasher.update(b"\0")
+
+        return hasher.hexdigest()
+
+
+    def path(self, key, ext):
+        return self.cache_dir / key[:2] / f"{key}.{ext}"
+
+
+    def transaction(self, *queries):
+        with self.lock:
+            cursor = self.connection.cursor()
+
+            cursor.execute("BEGIN IMMEDIATE")
+
+            try:
+                results = [
+                    cursor.execute(query, params).fetchall()
+                    for query, params in queries
+                ]
+
+                cursor.execute("COMMIT")
+
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+
+        return results
+
+
+# The counters of this cache and the ones of all the processes.
+    def count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+            self.transaction((
+                "INSERT INTO counters (name, value) VALUES (?, 1) "
+                "ON CONFLICT (name) DO UPDATE SET value = value + 1",
+                (name,)
+            ))
+
+
+    def get(self, key, ext, dest):
+        path = self.path(key, ext)
+
+        rows, _ = self.transaction(
+            ("SELECT key FROM entries WHERE key = ?", (key,)),
+            ("UPDATE entries SET used = ? WHERE key = ?", (time.time(), key)),
+        )
+
+        found = False
+
+        if rows:
+            dest.parent.mkdir(parents = True, exist_ok = True)
+
+# Another process can remove the file at the same time.
+            try:
+                shutil.copyfile(path, dest)
+                found = True
+
+            except FileNotFoundError:
+                self.transaction(
+                    ("DELETE FROM entries WHERE key = ?", (key,))
+                )
+
+        self.count("hits" if found else "misses")
+
+        return found
+
+
+    def put(self, key, ext, source):
+        path    = self.path(key, ext)
+        tmppath = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+
+        path.parent.mkdir(parents = True, exist_ok = True)
+
+        shutil.copyfile(source, tmppath)
+        os.replace(tmppath, path)
+
+        self.transaction((
+            "INSERT OR REPLACE INTO entries (key, ext, size, stykey, used) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, ext, path.stat().st_size, self.stykey, time.time())
+        ))
+
+        self.evict()
+
+
+    def removefiles(self, rows):
+        for key, ext in rows:
+            try:
+                os.remove(self.path(key, ext))
+
+            except FileNotFoundError:
+                pass
+
+
+# The entries are removed from the index before their files, so no process
+# finds an entry without its file, except during a short time.
+    def evict(self):
+        removed = []
+
+        with self.lock:
+            cursor = self.connection.cursor()
+
+            cursor.execute("BEGIN IMMEDIATE")
+
+            try:
+                total = cursor.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM entries"
+                ).fetchone()[0]
+
+                if total > self.maxbytes:
+                    for key, ext, size in cursor.execute(
+                        "SELECT key, ext, size FROM entries ORDER BY used"
+                    ).fetchall():
+                        if total <= self.maxbytes:
+                            break
+
+                        removed.append((key, ext))
+                        total -= size
+
+                    cursor.executemany(
+                        "DELETE FROM entries WHERE key = ?",
+                        [(key,) for key, _ in removed]
+                    )
+
+                cursor.execute("COMMIT")
+
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+
+        self.removefiles(removed)
+
+        return len(removed)
+
+
+    def purge(self):
+        rows, _ = self.transaction(
+            (
+                "SELECT key, ext FROM entries WHERE stykey != ?",
+                (self.stykey,)
+            ),
+            ("DELETE FROM entries WHERE stykey != ?", (self.stykey,)),
+        )
+
+        self.removefiles(rows)
+
+        return len(rows)
+
+
+    def stats(self):
+        (entries,), counters = self.transaction(
+            ("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries", ()),
+            ("SELECT name, value FROM counters", ()),
+        )
+
+        counters = dict(counters)
+
+        return {
+            "entries"     : entries[0],
+            "bytes"       : entries[1],
+            "maxbytes"    : self.maxbytes,
+            "hits"        : self.hits,
+            "misses"      : self.misses,
+            "total hits"  : counters.get("hits", 0),
+            "total misses": counters.get("misses", 0),
+        }
+
+
+    def close(self):
+        self.connection.close()
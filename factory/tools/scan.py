@@ -0,0 +1,283 @@
+#! /usr/bin/env python3
+
+# One scan of the factory and of ``lyalgo/`` shared by all the tools.
+#
+# The folders are walked once with ``os.scandir``. The index gives the files
+# by folder and by extension, and globs are matched against it without
+# touching the disk again.
+#
+# The index is stored in ``x-cache/scan.json`` with the modification times
+# of the folders. Adding, removing or renaming a file changes the time of
+# its folder, so a stored index is reused if no folder has changed. A folder
+# modified just before or during the scan cannot be trusted : in that case,
+# the next use walks everything again.
+
+import json
+import os
+from pathlib import Path
+import re
+import time
+
+from tools import CACHE_DIR, FACTORY_DIR, LYALGO_DIR, PROJECT_DIR
+from tools.trace import traced
+
+
+# --------------- #
+# -- CONSTANTS -- #
+# --------------- #
+
+SCAN_PATH = CACHE_DIR / "scan.json"
+
+SCAN_ROOTS = [FACTORY_DIR, LYALGO_DIR]
+
+# The cache changes at each run, so it would always invalidate the index.
+IGNORED_DIRS  = [CACHE_DIR]
+IGNORED_NAMES = ["__pycache__"]
+
+# The times of some file systems are not precise.
+RACY_DELAY = 2 * 10**9
+
+
+# ----------- #
+# -- GLOBS -- #
+# ----------- #
+
+def globclass(content):
+    negate = content[:1] == "!"
+
+    if negate:
+        content = content[1:]
+
+    chars = []
+
+    for i, char in enumerate(content):
+        if char == "-" and 0 < i < len(content) - 1:
+            chars.append("-")
+
+        else:
+            chars.append(re.escape(char))
+
+    return "[" + ("^" if negate else "") + "".join(chars) + "]"
+
+
+def globregex(pattern):
+    regex = []
+    i     = 0
+
+    while i < len(pattern):
+        char = pattern[i]
+
+        if pattern.startswith("**/", i):
+            regex.append("(?:.*/)?")
+            i += 3
+
+        elif pattern.startswith("**", i):
+            regex.append(".*")
+            i += 2
+
+        elif char == "*":
+            regex.append("[^/]*")
+            i += 1
+
+        elif char == "?":
+            regex.append("[^/]")
+            i += 1
+
+        elif char == "[":
+# A closing bracket just after the opening one is a character.
+            end = pattern.find("]", i + 2)
+
+            if end == -1:
+                regex.append(re.escape(char))
+                i += 1
+
+            else:
+                regex.append(globclass(pattern[i + 1:end]))
+                i = end + 1
+
+        else:
+            regex.append(re.escape(char))
+            i += 1
+
+    return re.compile("".join(regex) + r"\Z")
+
+
+# ---------- #
+# -- SCAN -- #
+# ---------- #
+
+class Scan:
+    def __init__(self, roots = None, path = SCAN_PATH):
+        self.roots   = roots or SCAN_ROOTS
+        self.path    = path
+        self.dirs    = {}
+        self.files   = []
+        self.scanned = 0
+        self.changed = False
+        self.byext   = {}
+        self.regexes = {}
+
+
+    @classmethod
+    def load(cls, roots = None, path = SCAN_PATH):
+        scan = cls(roots, path)
+
+        if path.is_file():
+            try:
+                with open(path, encoding = "utf-8") as jsonfile:
+                    content = json.load(jsonfile)
+
+                if content.get("roots") == scan.rootnames():
+                    scan.dirs    = content["dirs"]
+                    scan.files   = content["files"]
+                    scan.scanned = content["scanned"]
+
+# A broken index only means a new walk.
+            except (ValueError, OSError, KeyError):
+                pass
+
+        scan.refresh()
+
+        return scan
+
+
+    def rootnames(self):
+        return [
+            os.path.relpath(root, PROJECT_DIR).replace(os.sep, "/")
+            for root in self.roots
+        ]
+
+
+    def isvalid(self):
+        if not self.dirs:
+            return False
+
+        for reldir, mtime in self.dirs.items():
+            try:
+                newmtime = os.stat(PROJECT_DIR / reldir).st_mtime_ns
+
+            except OSError:
+                return False
+
+            if newmtime != mtime \
+            or mtime >= self.scanned - RACY_DELAY:
+                return False
+
+        return True
+
+
+    def refresh(self):
+        if self.isvalid():
+            return False
+
+        self.walk()
+
+        return True
+
+
+    @traced("scan walk", cat = "fs")
+    def walk(self):
+        self.scanned = time.time_ns()
+        self.dirs    = {}
+        self.files   = []
+
+        ignored = [str(onedir) for onedir in IGNORED_DIRS]
+        todo    = [str(root) for root in self.roots]
+
+        while todo:
+            onedir = todo.pop()
+            reldir = os.path.relpath(onedir, PROJECT_DIR).replace(os.sep, "/")
+
+            try:
+                self.dirs[reldir] = os.stat(onedir).st_mtime_ns
+
+                with os.scandir(onedir) as entries:
+                    for entry in entries:
+                        if entry.name in IGNORED_NAMES \
+                        or entry.path in ignored:
+                            continue
+
+                        if entry.is_dir(follow_symlinks = False):
+                            todo.append(entry.path)
+
+                        elif entry.is_file():
+                            self.files.append(f"{reldir}/{entry.name}")
+
+            except FileNotFoundError:
+                self.dirs.pop(reldir, None)
+
+        self.files.sort()
+
+        self.byext   = {}
+        self.changed = True
+
+
+    def save(self):
+        if not self.changed:
+            return
+
+        self.path.parent.mkdir(parents = True, exist_ok = True)
+
+        tmppath = self.path.with_suffix(".tmp")
+
+        with open(tmppath, mode = "w", encoding = "utf-8") as jsonfile:
+            json.dump(
+                {
+                    "roots"  : self.rootnames(),
+                    "scanned": self.scanned,
+                    "dirs"   : self.dirs,
+                    "files"  : self.files,
+                },
+                jsonfile,
+                separators = (",", ":")
+            )
+
+        os.replace(tmppath, self.path)
+
+        self.changed = False
+
+
+    def covers(self, relpattern):
+        return any(
+            relpattern.startswith(f"{rootname}/")
+            for rootname in self.rootnames()
+        )
+
+
+    def withext(self, ext):
+        if not self.byext:
+            for relfile in self.files:
+                self.byext.setdefault(
+                    os.path.splitext(relfile)[1], []
+                ).append(relfile)
+
+        return [
+            PROJECT_DIR / relfile
+            for relfile in self.byext.get(ext, [])
+        ]
+
+
+    def glob(self, relpattern):
+        if relpattern not in self.regexes:
+            self.regexes[relpattern] = globregex(relpattern)
+
+        regex = self.regexes[relpattern]
+
+        return [
+            PROJECT_DIR / relfile
+            for relfile in self.files
+            if regex.match(relfile)
+        ]
+
+
+    def under(self, onedir):
+        reldir = os.path.relpath(
+            Path(onedir).resolve(),
+            PROJECT_DIR
+        ).replace(os.sep, "/")
+
+        return [
+            PROJECT_DIR / relfile
+            for relfile in self.files
+            if relfile.startswith(f"{reldir}/")
+        ]
@@ -0,0 +1,215 @@
+#! /usr/bin/env python3
+
+# Smoke tests of the examples.
+#
+# Each example of ``lyalgo/examples`` is put alone in a minimal document
+# using ``lyalgo.sty``, and this document is compiled once. The compilations
+# are launched at the same time, each one in its own ``pdflatex`` process
+# killed after a timeout. Thanks to ``-halt-on-error``, a broken example
+# fails as soon as the first error is met.
+#
+# The examples are written for the doc : by default, they are compiled with
+# the header of a doc, so its language and its macros are known. The
+# minimal preamble only loads ``lyalgo.sty`` with the English keywords.
+#
+# The files of the compilations are in ``x-cache/smoke``. Only the log of
+# a failing example is kept.
+
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+import re
+import subprocess
+import time
+
+from tools import CACHE_DIR, FACTORY_DIR, LYALGO_DIR
+from tools.latex import PDFLATEX, PDFLATEX_OPTIONS
+from tools.scan import Scan
+from tools.texlog import analysefile, errorline
+
+
+# --------------- #
+# -- CONSTANTS -- #
+# --------------- #
+
+SMOKE_DIR  = CACHE_DIR / "smoke"
+CONFIG_DIR = FACTORY_DIR / "config"
+
+EXAMPLE_EXTS = [".tex", ".tkz"]
+
+TIMEOUT = 60
+
+DOC_LANG = "fr"
+
+MINIMAL_PREAMBLE = r"""
+\usepackage[utf8]{inputenc}
+\usepackage[T1]{fontenc}
+
+\usepackage[lang=english]{lyalgo}
+""".strip()
+
+HEADER_TEMPLATE = r"""
+\makeatletter
+
+{header}
+
+\makeatother
+
+\usepackage{{lyalgo}}
+""".strip()
+
+SMOKE_TEMPLATE = r"""
+\documentclass{{article}}
+
+{preamble}
+
+\begin{{document}}
+
+\input{{{example}}}
+
+\end{{document}}
+""".lstrip()
+
+
+# ----------- #
+# -- TOOLS -- #
+# ----------- #
+
+# The header is read like in the doc, between "\makeatletter" and
+# "\makeatother". The language of the keywords is the one of babel.
+def headerpreamble(lang = DOC_LANG, config_dir = CONFIG_DIR):
+    with open(
+        file     = config_dir / f"header[{lang}].sty",
+        encoding = "utf-8"
+    ) as headerfile:
+        header = headerfile.read().strip()
+
+    return HEADER_TEMPLATE.format(header = header)
+
+
+def findexamples(patterns = None, lyalgo_dir = LYALGO_DIR):
+    examples = []
+
+    scan = Scan.load()
+    scan.save()
+
+    for onepath in sorted(scan.under(lyalgo_dir / "examples")):
+        if onepath.suffix not in EXAMPLE_EXTS:
+            continue
+
+        example = onepath.relative_to(lyalgo_dir).as_posix()
+
+        if not patterns \
+        or any(fnmatch(example, pattern) for pattern in patterns):
+            examples.append(example)
+
+    return examples
+
+
+def smokename(example):
+    return "smoke-" + re.sub(r"[^\w-]", "-", example)
+
+
+def firsterror(logpath):
+    errors = analysefile(logpath)["errors"]
+
+    if not errors:
+        return ""
+
+    return errorline(errors[0])
+
+
+# ------------------ #
+# -- COMPILATIONS -- #
+# ------------------ #
+
+def smokeone(
+    example,
+    preamble   = MINIMAL_PREAMBLE,
+    timeout    = TIMEOUT,
+    lyalgo_dir = LYALGO_DIR,
+    smoke_dir  = SMOKE_DIR
+):
+    name    = smokename(example)
+    texpath = smoke_dir / f"{name}.tex"
+    logpath = smoke_dir / f"{name}.log"
+
+    with open(texpath, mode = "w", encoding = "utf-8") as texfile:
+        texfile.write(
+            SMOKE_TEMPLATE.format(
+                preamble = preamble,
+                example  = example
+            )
+        )
+
+    result = {
+        "example": example,
+        "success": False,
+        "time"   : 0.0,
+        "error"  : "",
+    }
+
+    start = time.time()
+
+# The working directory is the one of lyalgo.sty because this file uses
+# relative paths for the keywords.
+    try:
+        process = subprocess.run(
+            [PDFLATEX] + PDFLATEX_OPTIONS + [
+                "-halt-on-error",
+                f"-output-directory={smoke_dir}",
+                str(texpath)
+            ],
+            cwd     = lyalgo_dir,
+            stdin   = subprocess.DEVNULL,
+            stdout  = subprocess.DEVNULL,
+            stderr  = subprocess.DEVNULL,
+            timeout = timeout
+        )
+
+        result["success"] = not process.returncode
+
+        if process.returncode:
+            result["error"] = firsterror(logpath) or "Compilation failed."
+
+    except subprocess.TimeoutExpired:
+        result["error"] = f"Timeout after {timeout} s."
+
+    result["time"] = time.time() - start
+
+    for extrapath in smoke_dir.glob(f"{name}.*"):
+        if not (extrapath == logpath and not result["success"]):
+            extrapath.unlink()
+
+    return result
+
+
+# The function "onresult" is called as soon as one example is finished, so
+# the failures are known before the end. The results are in the order of
+# the examples.
+def smokeall(
+    examples,
+    preamble   = MINIMAL_PREAMBLE,
+    jobs       = 1,
+    timeout    = TIMEOUT,
+    onresult   = None,
+    lyalgo_dir = LYALGO_DIR,
+    smoke_dir  = SMOKE_DIR
+):
+    smoke_dir.mkdir(parents = True, exist_ok = True)
+
+    def runone(example):
+        result = smokeone(
+            example    = example,
+            preamble   = preamble,
+            timeout    = timeout,
+            lyalgo_dir = lyalgo_dir,
+            smoke_dir  = smoke_dir
+        )
+
+        if onresult is not None:
+            onresult(result)
+
+        return result
+
+    with ThreadPoolExecutor(max_workers = max(1, jobs)) as pool:
+        return list(pool.map(runone, examples))
@@ -0,0 +1,117 @@
+#! /usr/bin/env python3
+
+# Synchronization of a folder with a list of source files.
+#
+# The sizes, the modification times and the hashes are kept in a manifest,
+# so a file is only read again when its stat changes, and only copied when
+# its hash differs from the one of its destination. The files of the folder
+# that no longer have a source are removed.
+#
+# Hard links can be used instead of copies : nothing is written, but then
+# the source and the destination are the same file on the disk.
+
+import os
+import shutil
+
+from tools import CACHE_DIR
+from tools.manifest import Manifest
+from tools.output import tmppath
+
+
+# --------------- #
+# -- CONSTANTS -- #
+# --------------- #
+
+SYNC_MANIFEST_PATH = CACHE_DIR / "sync.json"
+
+
+# ----------- #
+# -- TOOLS -- #
+# ----------- #
+
+def putfile(source, dest, hardlink = False):
+    dest.parent.mkdir(parents = True, exist_ok = True)
+
+    tmpdest = tmppath(dest)
+
+    if tmpdest.exists():
+        tmpdest.unlink()
+
+    if hardlink:
+        try:
+            os.link(source, tmpdest)
+
+# For example, the two folders are not on the same device.
+        except OSError:
+            shutil.copyfile(source, tmpdest)
+
+    else:
+        shutil.copyfile(source, tmpdest)
+
+    os.replace(tmpdest, dest)
+
+
+def prune(dest_dir, keep):
+    removed = []
+
+    for root, dirs, files in os.walk(dest_dir, topdown = False):
+        for name in files:
+            onepath = os.path.join(root, name)
+
+            if onepath not in keep:
+                os.remove(onepath)
+                removed.append(onepath)
+
+        if root != str(dest_dir) and not os.listdir(root):
+            os.rmdir(root)
+
+    return removed
+
+
+# ---------- #
+# -- SYNC -- #
+# ---------- #
+
+def syncfiles(
+    pairs,
+    dest_dir,
+    outputs       = None,
+    hardlink      = False,
+    manifest_path = SYNC_MANIFEST_PATH
+):
+    manifest = Manifest(manifest_path)
+    stats    = {
+        "copied"   : 0,
+        "unchanged": 0,
+        "removed"  : 0,
+    }
+
+    for source, dest in pairs:
+        changed = manifest.hash(source) != manifest.hash(dest)
+
+        if changed:
+            putfile(source, dest, hardlink)
+
+            manifest.hash(dest)
+
+            stats["copied"] += 1
+
+        else:
+            stats["unchanged"] += 1
+
+        if outputs is not None:
+            outputs.add(dest, changed)
+
+    removed = prune(
+        dest_dir,
+        keep = {str(dest) for _, dest in pairs}
+    )
+
+    for onepath in removed:
+        manifest.hash(onepath)
+
+    stats["removed"] = len(removed)
+
+    manifest.save()
+
+    return stats
@@ -0,0 +1,282 @@
+#! /usr/bin/env python3
+
+# Analysis of the logs of ``pdflatex``.
+#
+# The compilations use ``-file-line-error``, so most of the errors look like
+# ``./file.tex:12: message``. The other ones start with ``!`` and their line
+# is given just after by ``l.12``.
+#
+# A report gives the errors, the overfull and underfull boxes, the number
+# of pages and the statistics printed at the end of the log after "Here is
+# how much of TeX's memory you used". A fatal error means that the next
+# passes are useless.
+#
+# The reports of a doc are kept in ``x-cache/logs/<jobname>.json`` with a
+# short history of the pages and of the memory used.
+
+import json
+import os
+import re
+import time
+
+from tools import CACHE_DIR
+
+
+# --------------- #
+# -- CONSTANTS -- #
+# --------------- #
+
+LOG_REPORT_DIR = CACHE_DIR / "logs"
+
+HISTORY_SIZE = 200
+
+PATTERN_FILE_LINE_ERROR = re.compile(
+    r"^(?P<file>\.?/?[^:\s()][^:()]*):(?P<line>\d+): (?P<message>.*)$"
+)
+
+PATTERN_LINE = re.compile(r"^l\.(\d+) ")
+
+PATTERN_BOX = re.compile(
+    r"^(?P<kind>Overfull|Underfull) \\(?P<box>[hv])box "
+    r"\((?P<amount>[^)]*)\)"
+    r"(?:.*? at lines? (?P<first>\d+)(?:--(?P<last>\d+))?)?"
+)
+
+PATTERN_PAGES = re.compile(
+    r"Output written on .*? \((?P<pages>\d+) pages?, (?P<bytes>\d+) bytes\)"
+)
+
+MEMORY_START = "Here is how much of TeX's memory you used:"
+
+MEMORY_PATTERNS = [
+    ("strings"          , r"(\d+) strings out of (\d+)"),
+    ("string characters", r"(\d+) string characters out of (\d+)"),
+    ("main memory"      , r"(\d+) words of memory out of (\d+)"),
+    ("hash"             , r"(\d+) multiletter control sequences out of (\d+)\+(\d+)"),
+    ("font info"        , r"(\d+) words of font info .* out of (\d+)"),
+    ("hyphenation"      , r"(\d+) hyphenation exceptions out of (\d+)"),
+]
+
+# "5i,0n,5p,44b,14s stack positions out of 5000i,500n,10000p,200000b,80000s"
+STACK_NAMES = {
+    "i": "input stack",
+    "n": "nest",
+    "p": "parameters",
+    "b": "buffer",
+    "s": "save size",
+}
+
+PATTERN_STACK = re.compile(r"(\S+) stack positions out of (\S+)")
+
+FATAL_MARKS = [
+    "Emergency stop",
+    "Fatal error occurred",
+    "TeX capacity exceeded",
+    "job aborted",
+]
+
+
+# ----------- #
+# -- TOOLS -- #
+# ----------- #
+
+def logpath(texpath):
+    return texpath.parent / f"{texpath.stem}.log"
+
+
+def reportpath(jobname, report_dir = LOG_REPORT_DIR):
+    return report_dir / f"{jobname}.json"
+
+
+def readlines(path):
+    try:
+        with open(path, encoding = "utf-8", errors = "replace") as logfile:
+            return logfile.read().splitlines()
+
+    except FileNotFoundError:
+        return []
+
+
+def stackvalues(text):
+    return {
+        item[-1]: int(item[:-1])
+        for item in text.split(",")
+        if item[:-1].isdigit()
+    }
+
+
+# -------------- #
+# -- ANALYSIS -- #
+# -------------- #
+
+def memorystats(lines):
+    stats = {}
+
+    for line in lines:
+        for name, pattern in MEMORY_PATTERNS:
+            match = re.search(pattern, line)
+
+            if match:
+                used, *limits = match.groups()
+
+                stats[name] = [int(used), sum(int(x) for x in limits)]
+                break
+
+        else:
+            match = PATTERN_STACK.search(line)
+
+            if match:
+                used   = stackvalues(match.group(1))
+                limits = stackvalues(match.group(2))
+
+                for key, name in STACK_NAMES.items():
+                    if key in used and key in limits:
+                        stats[name] = [used[key], limits[key]]
+
+    return stats
+
+
+def analyse(lines):
+    report = {
+        "errors"   : [],
+        "overfull" : [],
+        "underfull": [],
+        "pages"    : None,
+        "bytes"    : None,
+        "memory"   : {},
+        "fatal"    : False,
+    }
+
+    for i, line in enumerate(lines):
+        if any(mark in line for mark in FATAL_MARKS):
+            report["fatal"] = True
+
+        match = PATTERN_FILE_LINE_ERROR.match(line)
+
+        if match:
+            report["errors"].append({
+                "file"   : match.group("file"),
+                "line"   : int(match.group("line")),
+                "message": match.group("message").strip(),
+            })
+            continue
+
+        if line.startswith("! "):
+            error = {
+                "file"   : None,
+                "line"   : None,
+                "message": line[2:].strip(),
+            }
+
+            for nextline in lines[i + 1:i + 10]:
+                match = PATTERN_LINE.match(nextline)
+
+                if match:
+                    error["line"] = int(match.group(1))
+                    break
+
+            report["errors"].append(error)
+            continue
+
+        match = PATTERN_BOX.match(line)
+
+        if match:
+            first = match.group("first")
+            last  = match.group("last") or first
+
+            report[match.group("kind").lower()].append({
+                "box"   : match.group("box") + "box",
+                "amount": match.group("amount"),
+                "lines" : [int(first), int(last)] if first else None,
+            })
+            continue
+
+# The log is cut after 79 characters.
+        if line.startswith("Output written on"):
+            match = PATTERN_PAGES.search("".join(lines[i:i + 4]))
+
+            if match:
+                report["pages"] = int(match.group("pages"))
+                report["bytes"] = int(match.group("bytes"))
+
+        elif line.startswith(MEMORY_START):
+            report["memory"] = memorystats(lines[i + 1:i + 10])
+
+    return report
+
+
+def analysefile(path):
+    return analyse(readlines(path))
+
+
+def isfatal(path):
+    return analysefile(path)["fatal"]
+
+
+# ------------- #
+# -- REPORTS -- #
+# ------------- #
+
+def summary(report):
+    text = (
+        f"{len(report['errors'])} error(s), "
+        f"{len(report['overfull'])} overfull and "
+        f"{len(report['underfull'])} underfull box(es)"
+    )
+
+    if report["pages"] is not None:
+        text += f", {report['pages']} page(s)"
+
+    return text + "."
+
+
+def errorline(error):
+    if error["file"] is not None:
+        return f"{error['file']}:{error['line']}: {error['message']}"
+
+    if error["line"] is not None:
+        return f"l.{error['line']}: {error['message']}"
+
+    return error["message"]
+
+
+def savereport(jobname, report, nbpasses, report_dir = LOG_REPORT_DIR):
+    path = reportpath(jobname, report_dir)
+
+    try:
+        with open(path, encoding = "utf-8") as jsonfile:
+            history = json.load(jsonfile)["history"]
+
+# A broken report only means a new history.
+    except (ValueError, OSError, KeyError):
+        history = []
+
+    history.append({
+        "time"  : int(time.time()),
+        "passes": nbpasses,
+        "fatal" : report["fatal"],
+        "errors": len(report["errors"]),
+        "pages" : report["pages"],
+        "memory": {
+            name: used
+            for name, (used, _) in report["memory"].items()
+        },
+    })
+
+    report_dir.mkdir(parents = True, exist_ok = True)
+
+    tmppath = path.with_suffix(".tmp")
+
+    with open(tmppath, mode = "w", encoding = "utf-8") as jsonfile:
+        json.dump(
+            {
+                "report" : report,
+                "history": history[-HISTORY_SIZE:],
+            },
+            jsonfile,
+            indent = 1
+        )
+
+    os.replace(tmppath, path)
+
+    return path
@@ -0,0 +1,285 @@
+#! /usr/bin/env python3
+
+# Timing spans of the factory.
+#
+# A span times one stage, like a walk of the folders or a pass of
+# ``pdflatex``. The spans of one thread nest like the calls. Nothing is
+# recorded, and a span costs almost nothing, until the tracing is started.
+#
+# The folder of the trace is given to the child processes by the variable
+# ``LYALGO_TRACE``, so the builders launched by ``launch.py`` record their
+# spans too. Each process appends its spans to its own file
+# ``<pid>.jsonl`` in this folder. The spans of a process are written when
+# the process ends, or when ``flush`` is called : the workers of a pool of
+# processes never end normally, so they must call it.
+#
+# All the files give one trace in the JSON format of Chrome, read by
+# ``chrome://tracing`` and Perfetto, and a summary table. The self time of
+# a span is its time minus the one of the spans nested inside it.
+
+import atexit
+from contextlib import contextmanager
+import functools
+import json
+import os
+from pathlib import Path
+import shutil
+import sys
+import threading
+import time
+
+from tools import CACHE_DIR
+
+
+# --------------- #
+# -- CONSTANTS -- #
+# --------------- #
+
+TRACE_ENV = "LYALGO_TRACE"
+
+TRACE_DIR = CACHE_DIR / "trace"
+
+SUMMARY_SIZE = 25
+
+
+# ----------- #
+# -- STATE -- #
+# ----------- #
+
+# The tracing is on in a child process if it is on in its parent.
+EVENTS      = []
+EVENTS_LOCK = threading.Lock()
+
+TRACING      = os.environ.get(TRACE_ENV)
+PROCESS_NAME = Path(sys.argv[0]).stem or "python"
+PROCESS_ID   = os.getpid()
+
+
+def starttrace(trace_dir = TRACE_DIR, name = None):
+    global TRACING, PROCESS_NAME
+
+    shutil.rmtree(trace_dir, ignore_errors = True)
+    trace_dir.mkdir(parents = True)
+
+    TRACING = str(trace_dir)
+    os.environ[TRACE_ENV] = TRACING
+
+    if name:
+        PROCESS_NAME = name
+
+
+def istracing():
+    return TRACING is not None
+
+
+# ----------- #
+# -- SPANS -- #
+# ----------- #
+
+@contextmanager
+def span(name, cat = "factory", **args):
+    if TRACING is None:
+        yield
+        return
+
+    start = time.time()
+
+    try:
+        yield
+
+    finally:
+        end = time.time()
+
+        event = {
+            "name": name,
+            "cat" : cat,
+            "ph"  : "X",
+            "ts"  : start * 1e6,
+            "dur" : (end - start) * 1e6,
+            "pid" : os.getpid(),
+            "tid" : threading.get_native_id(),
+            "args": {key: str(value) for key, value in args.items()},
+        }
+
+        with EVENTS_LOCK:
+            EVENTS.append(event)
+
+
+def traced(name = None, cat = "factory"):
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name or function.__name__, cat):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# A forked process inherits the spans of its parent : they are not its own.
+def flush():
+    global EVENTS
+
+    if TRACING is None:
+        return
+
+    with EVENTS_LOCK:
+        events = [
+            event
+            for event in EVENTS
+            if event["pid"] == os.getpid()
+        ]
+        EVENTS = []
+
+    if not events:
+        return
+
+# A forked worker keeps the name of its parent.
+    name = PROCESS_NAME
+
+    if os.getpid() != PROCESS_ID:
+        name += " (worker)"
+
+    events.append({
+        "name": "process_name",
+        "ph"  : "M",
+        "pid" : os.getpid(),
+        "args": {"name": name},
+    })
+
+    eventpath = Path(TRACING) / f"{os.getpid()}.jsonl"
+
+    with open(eventpath, mode = "a", encoding = "utf-8") as eventfile:
+        for event in events:
+            eventfile.write(json.dumps(event) + "\n")
+
+
+atexit.register(flush)
+
+
+# ------------ #
+# -- EXPORT -- #
+# ------------ #
+
+def readevents(trace_dir = TRACE_DIR):
+    events = []
+
+    for eventpath in sorted(trace_dir.glob("*.jsonl")):
+        with open(eventpath, encoding = "utf-8") as eventfile:
+            for line in eventfile:
+                line = line.strip()
+
+# The last line of a process killed can be broken.
+                try:
+                    events.append(json.loads(line))
+
+                except ValueError:
+                    pass
+
+    return events
+
+
+# The times start at the first span.
+def chrometrace(events):
+    spans = [event for event in events if event["ph"] == "X"]
+    start = min((event["ts"] for event in spans), default = 0)
+
+    traceevents = [event for event in events if event["ph"] == "M"]
+
+    for event in sorted(spans, key = lambda event: event["ts"]):
+        traceevents.append(dict(event, ts = event["ts"] - start))
+
+    return {
+        "traceEvents"    : traceevents,
+        "displayTimeUnit": "ms",
+    }
+
+
+def exporttrace(path, trace_dir = TRACE_DIR):
+    events = readevents(trace_dir)
+
+    path.parent.mkdir(parents = True, exist_ok = True)
+
+    tmppath = path.with_name(f"{path.name}.tmp")
+
+    with open(tmppath, mode = "w", encoding = "utf-8") as jsonfile:
+        json.dump(chrometrace(events), jsonfile)
+
+    os.replace(tmppath, path)
+
+    return events
+
+
+# ------------- #
+# -- SUMMARY -- #
+# ------------- #
+
+def selftimes(spans):
+    selfs   = [onespan["dur"] for onespan in spans]
+    threads = {}
+
+    for i, onespan in enumerate(spans):
+        threads.setdefault((onespan["pid"], onespan["tid"]), []).append(i)
+
+# A span is inside the last one still open in its thread.
+    for indexes in threads.values():
+        indexes.sort(key = lambda i: (spans[i]["ts"], -spans[i]["dur"]))
+
+        stack = []
+
+        for i in indexes:
+            while stack \
+            and spans[stack[-1]]["ts"] + spans[stack[-1]]["dur"] \
+                <= spans[i]["ts"]:
+                stack.pop()
+
+            if stack:
+                selfs[stack[-1]] -= spans[i]["dur"]
+
+            stack.append(i)
+
+    return selfs
+
+
+def summary(events):
+    spans = [event for event in events if event["ph"] == "X"]
+    rows  = {}
+
+    for onespan, selftime in zip(spans, selftimes(spans)):
+        row = rows.setdefault(
+            onespan["name"],
+            {
+                "name" : onespan["name"],
+                "calls": 0,
+                "total": 0.0,
+                "self" : 0.0,
+                "max"  : 0.0,
+            }
+        )
+
+        row["calls"] += 1
+        row["total"] += onespan["dur"] / 1e3
+        row["self"]  += selftime / 1e3
+        row["max"]    = max(row["max"], onespan["dur"] / 1e3)
+
+    return sorted(rows.values(), key = lambda row: -row["self"])
+
+
+def summarytable(rows, size = SUMMARY_SIZE):
+    rows  = rows[:size]
+    width = max([len("span")] + [len(row["name"]) for row in rows])
+
+    lines = [
+        f"{'span':<{width}}  {'calls':>6}  {'total ms':>10}  "
+        f"{'self ms':>10}  {'max ms':>10}"
+    ]
+
+    for row in rows:
+        lines.append(
+            f"{row['name']:<{width}}  {row['calls']:>6}  "
+            f"{row['total']:>10.1f}  {row['self']:>10.1f}  "
+            f"{row['max']:>10.1f}"
+        )
+
+    return lines
@@ -0,0 +1,290 @@
+#! /usr/bin/env python3
+
+# Watching of the sources to relaunch only the steps concerned.
+#
+# The inputs of the steps are watched. When one of them is created, changed
+# or removed, the steps reading it are launched again, followed by all the
+# steps waiting for them. Interactive steps are never launched this way.
+#
+# The changes are found by comparing the sizes and the modification times.
+# With the optional package ``inotify_simple``, the watcher sleeps until the
+# kernel signals a change in one folder. Otherwise, the files are polled.
+# Several saves done in a short time give only one build.
+#
+# The pool of processes lives as long as the watching session : the
+# builders imported by its workers are ready for the next rebuilds. The
+# steps relaunched receive their options for watching, for example a
+# partial build of the doc typesetting only the units using the changed
+# sources.
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import copy
+import os
+import select
+import signal
+import time
+
+from tools import PROJECT_DIR
+from tools.graph import currentscan, launch
+
+try:
+    from inotify_simple import INotify, flags as INFLAGS
+
+except ImportError:
+    INotify = None
+
+
+# --------------- #
+# -- CONSTANTS -- #
+# --------------- #
+
+POLL_DELAY     = 0.5
+DEBOUNCE_DELAY = 0.25
+
+
+# ----------- #
+# -- TOOLS -- #
+# ----------- #
+
+def inputsbystep(steps):
+    return {
+        step.name: set(step.inputpaths())
+        for step in steps
+        if not step.interactive
+    }
+
+
+def snapshot(inputs):
+    state = {}
+
+    for paths in inputs.values():
+        for onepath in paths:
+            try:
+                infos = os.stat(onepath)
+
+            except FileNotFoundError:
+                continue
+
+            state[onepath] = (infos.st_size, infos.st_mtime_ns)
+
+    return state
+
+
+def changedpaths(oldstate, newstate):
+    return {
+        onepath
+        for onepath in set(oldstate) | set(newstate)
+        if oldstate.get(onepath) != newstate.get(onepath)
+    }
+
+
+# The steps reading the changed files and all the steps waiting for them.
+def affected(steps, changed, *inputs):
+    names = {
+        name
+        for oneinputs in inputs
+        for name, paths in oneinputs.items()
+        if paths & changed
+    }
+
+    found = True
+
+    while found:
+        found = False
+
+        for step in steps:
+            if step.name not in names \
+            and not step.interactive \
+            and set(step.after) & names:
+                names.add(step.name)
+                found = True
+
+    return names
+
+
+# Ctrl+C is for the watcher : a worker finishes its builder, and then the
+# pool stops.
+def ignoreinterrupt():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def newpool(jobs):
+    return ProcessPoolExecutor(
+        max_workers = jobs,
+        initializer = ignoreinterrupt
+    )
+
+
+def substeps(steps, names):
+    chosen = []
+
+    for step in steps:
+        if step.name in names:
+            step       = copy.copy(step)
+            step.after = [name for name in step.after if name in names]
+
+            chosen.append(step)
+
+    return chosen
+
+
+def watchsteps(steps):
+    chosen = []
+
+    for step in steps:
+        step         = copy.copy(step)
+        step.options = dict(step.options, **step.watchoptions)
+
+        chosen.append(step)
+
+    return chosen
+
+
+# -------------- #
+# -- WATCHERS -- #
+# -------------- #
+
+class PollWatcher:
+    kind = "polling"
+
+
+    def wait(self):
+        time.sleep(POLL_DELAY)
+
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    kind = "inotify"
+
+
+    def __init__(self):
+        self.inotify = INotify()
+        self.mask    = INFLAGS.CREATE | INFLAGS.DELETE | INFLAGS.MODIFY \
+                     | INFLAGS.CLOSE_WRITE | INFLAGS.MOVED_FROM \
+                     | INFLAGS.MOVED_TO
+
+        self.update()
+
+
+# New folders must be watched too.
+    def update(self):
+        self.watched = set()
+
+        for reldir in currentscan().dirs:
+            self.inotify.add_watch(str(PROJECT_DIR / reldir), self.mask)
+            self.watched.add(reldir)
+
+
+# No timeout : nothing is done until the kernel signals a change.
+    def wait(self):
+        select.select([self.inotify], [], [])
+
+        self.inotify.read()
+
+        if set(currentscan().dirs) != self.watched:
+            self.update()
+
+
+    def close(self):
+        self.inotify.close()
+
+
+def newwatcher():
+    if INotify is None:
+        return PollWatcher()
+
+    try:
+        return InotifyWatcher()
+
+# For example, too many folders for the limits of the system.
+    except OSError:
+        return PollWatcher()
+
+
+# ----------- #
+# -- WATCH -- #
+# ----------- #
+
+def watch(
+    steps,
+    manifest,
+    jobs      = 1,
+    inprocess = True
+):
+    watcher = newwatcher()
+    inputs  = inputsbystep(steps)
+    state   = snapshot(inputs)
+
+    print(
+        f"+ Watching {len(state)} files ({watcher.kind}). "
+        "Use Ctrl+C to stop."
+    )
+
+    pool = newpool(jobs)
+
+    try:
+        while True:
+            watcher.wait()
+
+# New files can be inputs of some steps.
+            newinputs = inputsbystep(steps)
+            newstate  = snapshot(newinputs)
+            changed   = changedpaths(state, newstate)
+
+            if not changed:
+                continue
+
+# Waiting for the end of a series of saves.
+            while True:
+                time.sleep(DEBOUNCE_DELAY)
+
+                lastinputs = inputsbystep(steps)
+                laststate  = snapshot(lastinputs)
+
+                if laststate == newstate:
+                    break
+
+                changed  |= changedpaths(newstate, laststate)
+                newinputs = lastinputs
+                newstate  = laststate
+
+            names = affected(steps, changed, inputs, newinputs)
+
+            if names:
+                start = time.time()
+
+                print(f"+ {len(changed)} file(s) changed.")
+
+                try:
+                    success = launch(
+                        steps     = watchsteps(substeps(steps, names)),
+                        manifest  = manifest,
+                        jobs      = jobs,
+                        inprocess = inprocess,
+                        pool      = pool
+                    )
+
+# A worker killed breaks the pool : the next rebuild uses a new one.
+                except BrokenProcessPool:
+                    success = False
+                    pool    = newpool(jobs)
+
+                print(
+                    f"+ Rebuild {'done' if success else 'stopped'} "
+                    f"in {time.time() - start:.2f} s."
+                )
+
+# The files written by the builders are not changes to follow.
+            inputs = inputsbystep(steps)
+            state  = snapshot(inputs)
+
+    except KeyboardInterrupt:
+        print("+ Watching stopped.")
+
+    finally:
+        watcher.close()
+        pool.shutdown(wait = False, cancel_futures = True)